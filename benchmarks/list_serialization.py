@@ -0,0 +1,76 @@
+"""Benchmark: GET /api/inventory/ response time, default vs FAST_RESPONSES path.
+
+Fills a temporary warehouse with N rows and times the full request through the
+ASGI app, once with response_model validation and once with the JSON built by
+SQLite.
+
+    python benchmarks/list_serialization.py --rows 1000 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _fill(path: str, rows: int):
+    import database
+
+    conn = sqlite3.connect(path)
+    conn.executescript(database.SCHEMA)
+    conn.execute("DELETE FROM inventory")
+    conn.executemany(
+        "INSERT INTO inventory (item_name, location, quantity) VALUES (?, ?, ?)",
+        ((f"ürün {n}", f"raf {n % 50}", n % 100) for n in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _time(client, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get("/api/inventory/")
+        best = min(best, time.perf_counter() - start)
+        response.raise_for_status()
+        size = len(response.content)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_DIR"] = tmp
+        os.environ["DATABASE_PATH"] = os.path.join(tmp, "main.db")
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from routers import inventory
+        import database
+
+        app = FastAPI()
+        app.include_router(inventory.router)
+
+        print(f"{'rows':>7}  {'default ms':>10}  {'fast ms':>8}  {'speedup':>7}  {'bytes':>9}")
+        for rows in args.rows:
+            _fill(os.environ["DATABASE_PATH"], rows)
+            with TestClient(app) as client:
+                inventory.FAST_RESPONSES = False
+                slow, size = _time(client, args.repeat)
+                inventory.FAST_RESPONSES = True
+                fast, _ = _time(client, args.repeat)
+            asyncio.run(database.close_all())
+            print(f"{rows:>7}  {slow * 1000:>10.1f}  {fast * 1000:>8.1f}  {slow / fast:>6.1f}x  {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark: inventory write throughput versus number of warehouse shards.
+
+Spreads a fixed number of concurrent inserts over 1, 2, 4, ... warehouses and
+reports inserts per second. Every run uses a fresh temporary DATABASE_DIR.
+
+    python benchmarks/shard_writes.py --writes 2000 --shards 1 2 4 8 --synchronous NORMAL
+
+Shards let the writes of different warehouses run in parallel on their own
+connection threads, but the event loop still spends CPU on every write (about
+250 µs here). The "cpu" column is process CPU time over wall time: at about
+100% of one core the run is CPU-bound, and more shards can only help with
+more cores.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def _run(database, shards: int, writes: int, concurrency: int) -> tuple[float, float]:
+    warehouses = [f"bench-{i}" for i in range(shards)]
+    queue = asyncio.Queue()
+    for n in range(writes):
+        queue.put_nowait(n)
+
+    async def worker():
+        while not queue.empty():
+            n = queue.get_nowait()
+            await database.add_item(f"ürün {n}", "raf", warehouse=warehouses[n % shards])
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    await database.close_all()
+    return writes / elapsed, cpu / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--dir", default=None, help="parent directory for the shard files (use real disk, not tmpfs)")
+    parser.add_argument("--synchronous", default=None, choices=["OFF", "NORMAL", "FULL", "EXTRA"],
+                        help="PRAGMA synchronous for the shards (default: SQLITE_SYNCHRONOUS or FULL)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        os.environ["DATABASE_DIR"] = tmp
+        os.environ["DATABASE_PATH"] = os.path.join(tmp, "main.db")
+        os.environ["MAX_OPEN_SHARDS"] = str(max(args.shards))
+        if args.synchronous:
+            os.environ["SQLITE_SYNCHRONOUS"] = args.synchronous
+        import database
+
+        print(f"synchronous={database.SQLITE_SYNCHRONOUS}, {os.cpu_count()} CPU(s)")
+        baseline = None
+        print(f"{'shards':>6}  {'writes/s':>10}  {'speedup':>7}  {'cpu':>5}")
+        for shards in args.shards:
+            rate, cpu = asyncio.run(_run(database, shards, args.writes, args.concurrency))
+            baseline = baseline or rate
+            print(f"{shards:>6}  {rate:>10.0f}  {rate / baseline:>6.2f}x  {cpu:>4.0%}")
+
+
+if __name__ == "__main__":
+    main()
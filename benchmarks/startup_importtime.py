@@ -0,0 +1,65 @@
+"""Benchmark: import cost of the application entry point.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, once in
+the default mode and once with REST_ONLY=1, and reports the total import time,
+the slowest modules imported directly by main and whether torch/transformers
+were loaded.
+
+    python benchmarks/startup_importtime.py --top 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("torch", "transformers")
+
+
+def _measure(env_overrides: dict) -> tuple[int, dict, set]:
+    """Return (total microseconds of `import main`, cumulative microseconds per direct import of main, all imported modules)."""
+    env = {**os.environ, **env_overrides}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(proc.stderr.strip().splitlines()[-1])
+
+    total = 0
+    children = {}
+    pending = {}
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, raw_name = line[len("import time:"):].split("|")
+        name = raw_name.strip()
+        loaded.add(name)
+        # The tree is printed children first, indented two spaces per level
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if depth == 1:
+            pending[name] = int(cumulative)
+        elif depth == 0:
+            if name == "main":
+                total, children = int(cumulative), pending
+            pending = {}
+    return total, children, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, env in (("default", {"REST_ONLY": "0"}), ("rest-only", {"REST_ONLY": "1"})):
+        total, packages, loaded = _measure(env)
+        heavy = sorted(name for name in loaded if name in HEAVY)
+        print(f"[{label}] total import time: {total / 1000:.1f} ms, "
+              f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+        for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"  {us / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,26 @@ import os
 # Database
 DATABASE_PATH = os.getenv("DATABASE_PATH", "inventory.db")
 
-# NLU Models (Hugging Face)
-INTENT_MODEL = "dbmdz/distilbert-base-turkish-cased"
-NER_MODEL = "akdeniz27/bert-base-turkish-cased-ner"
+# Warehouse shards: every warehouse gets its own SQLite file under DATABASE_DIR.
+# The default warehouse keeps using DATABASE_PATH so existing data stays in place.
+DATABASE_DIR = os.getenv("DATABASE_DIR", "data")
+DEFAULT_WAREHOUSE = os.getenv("DEFAULT_WAREHOUSE", "main")
+ALL_WAREHOUSES = "*"
+MAX_OPEN_SHARDS = int(os.getenv("MAX_OPEN_SHARDS", "16"))
+# PRAGMA synchronous for every shard. FULL syncs the WAL on each commit; NORMAL
+# only at checkpoints, which is still corruption-safe in WAL mode but may lose
+# the last commits on power loss (not on an application crash).
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "FULL").upper()
+if SQLITE_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise ValueError(f"SQLITE_SYNCHRONOUS must be OFF, NORMAL, FULL or EXTRA, not {SQLITE_SYNCHRONOUS!r}")
+
+# NLU Models: a Hugging Face model ID or a local model directory.
+# Hub IDs are resolved against the local registry in MODEL_DIR first
+# (see `python -m nlu.registry --help`); MODEL_OFFLINE=1 forbids Hub downloads.
+INTENT_MODEL = os.getenv("INTENT_MODEL", "emrecan/bert-base-turkish-cased-mean-nli-stsb-tr")
+NER_MODEL = os.getenv("NER_MODEL", "akdeniz27/bert-base-turkish-cased-ner")
+MODEL_DIR = os.getenv("MODEL_DIR", "model_store")
+MODEL_OFFLINE = os.getenv("MODEL_OFFLINE", "0") == "1"
 
 # Intent labels for zero-shot classification
 INTENT_LABELS = {
@@ -15,6 +32,7 @@ INTENT_LABELS = {
     "query_location": ["nerede", "konumu", "yeri", "bul", "ara"],
     "list_items": ["listele", "göster", "hepsini göster", "envanter"],
     "update_quantity": ["güncelle", "miktar değiştir", "adet güncelle", "sayı değiştir"],
+    "location_summary": ["ne var", "neler var", "kaç ürün var", "kaç tane var"],
 }
 
 # Zero-shot candidate labels (Turkish)
@@ -24,6 +42,7 @@ ZERO_SHOT_LABELS = [
     "konum sorgulama",
     "envanter listeleme",
     "miktar güncelleme",
+    "konum içeriği sorgulama",
 ]
 
 # Mapping from zero-shot label to intent key
@@ -33,8 +52,33 @@ LABEL_TO_INTENT = {
     "konum sorgulama": "query_location",
     "envanter listeleme": "list_items",
     "miktar güncelleme": "update_quantity",
+    "konum içeriği sorgulama": "location_summary",
 }
 
+# Inference admission control for /api/chat
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", "2"))
+INFERENCE_QUEUE_LIMIT = int(os.getenv("INFERENCE_QUEUE_LIMIT", "8"))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "10"))
+INFERENCE_RETRY_AFTER = int(os.getenv("INFERENCE_RETRY_AFTER", "5"))
+# When saturated, answer with keyword intents + heuristic parsing instead of 503
+INFERENCE_DEGRADED_MODE = os.getenv("INFERENCE_DEGRADED_MODE", "0") == "1"
+
+# REST-only mode: skip the chat router so NLU dependencies are never imported
+REST_ONLY = os.getenv("REST_ONLY", "0") == "1"
+
+# Fast response path: build JSON in SQLite / pydantic-core and skip FastAPI's
+# response_model re-validation for list, search and chat responses
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "0") == "1"
+
+# Admin endpoints (profiling) are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Profiling: ring buffer size, sampling interval (seconds) and an optional
+# slow-request threshold in milliseconds that enables capture at startup
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+SLOW_REQUEST_MS = float(os.environ["SLOW_REQUEST_MS"]) if os.getenv("SLOW_REQUEST_MS") else None
+
 # Server
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))
@@ -1,6 +1,37 @@
-"""SQLite database layer with async support."""
+"""SQLite database layer with async support.
+
+Each warehouse lives in its own SQLite file (a "shard"), so writes to different
+warehouses never contend for the same database lock. A shard has a writer
+connection, used one operation at a time, and a read-only connection that runs
+alongside it (WAL mode). Shard files are only created by writes that add items;
+other operations on an unknown warehouse raise LookupError. Shards are opened
+lazily on first use and the least recently used idle ones are closed once more
+than MAX_OPEN_SHARDS are open.
+"""
+import asyncio
+import heapq
+import json
+import os
+import re
+import sqlite3
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
 import aiosqlite
-from config import DATABASE_PATH
+from config import (
+    DATABASE_PATH,
+    DATABASE_DIR,
+    DEFAULT_WAREHOUSE,
+    ALL_WAREHOUSES,
+    MAX_OPEN_SHARDS,
+    SQLITE_SYNCHRONOUS,
+)
+from nlu.normalizer import normalize_location
+
+try:
+    import orjson
+except ImportError:  # optional, only speeds up cross-warehouse JSON responses
+    orjson = None
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS inventory (
@@ -10,109 +41,451 @@ CREATE TABLE IF NOT EXISTS inventory (
     quantity INTEGER DEFAULT 1,
     last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
 );
+
+CREATE TABLE IF NOT EXISTS location_summary (
+    location TEXT PRIMARY KEY,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    total_quantity INTEGER NOT NULL DEFAULT 0
+);
 """
 
+# One inventory row as a JSON object, built by SQLite; the parameter is the warehouse
+_ITEM_JSON = (
+    "json_object('id', id, 'item_name', item_name, 'location', location, "
+    "'quantity', quantity, 'last_updated', last_updated, 'warehouse', ?)"
+)
 
-async def get_db() -> aiosqlite.Connection:
-    """Get a database connection."""
-    db = await aiosqlite.connect(DATABASE_PATH)
-    db.row_factory = aiosqlite.Row
-    return db
+# ORDER BY inside aggregate functions needs SQLite 3.44+
+_AGGREGATE_ORDER_BY = sqlite3.sqlite_version_info >= (3, 44, 0)
+# INSERT ... RETURNING needs SQLite 3.35+
+_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
 
+_WAREHOUSE_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
 
-async def init_db():
-    """Initialize database schema."""
-    db = await get_db()
+
+def validate_warehouse(warehouse: str, allow_all: bool = False) -> str:
+    """
+    Check a warehouse name and return it.
+
+    Names double as file names, so only lowercase letters, digits, '-' and '_'
+    are accepted. ALL_WAREHOUSES ("*") is only valid for read-only fan-out calls.
+    """
+    if warehouse == ALL_WAREHOUSES:
+        if allow_all:
+            return warehouse
+        raise ValueError("Bu işlem için tek bir depo belirtilmelidir.")
+    if not _WAREHOUSE_RE.match(warehouse or ""):
+        raise ValueError(f"Geçersiz depo adı: '{warehouse}'")
+    return warehouse
+
+
+def _shard_path(warehouse: str) -> str:
+    if warehouse == DEFAULT_WAREHOUSE:
+        return DATABASE_PATH
+    return os.path.join(DATABASE_DIR, f"{warehouse}.db")
+
+
+def warehouse_exists(warehouse: str) -> bool:
+    """True if the warehouse has a database file (or an open shard)."""
+    return warehouse in _shards or os.path.exists(_shard_path(warehouse))
+
+
+class _Shard:
+    """A single warehouse database file and its lazily opened connections."""
+
+    def __init__(self, warehouse: str):
+        self.warehouse = warehouse
+        self.path = _shard_path(warehouse)
+        self.writer: aiosqlite.Connection | None = None
+        self.reader: aiosqlite.Connection | None = None
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.writer is not None
+
+    async def open(self):
+        """Open both connections; the caller must hold self.lock."""
+        if self.writer is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            writer = await aiosqlite.connect(self.path)
+            writer.row_factory = aiosqlite.Row
+            await writer.execute("PRAGMA journal_mode=WAL")
+            await writer.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            await writer.executescript(SCHEMA)
+            await _backfill_location_summary(writer)
+            await writer.commit()
+            reader = await aiosqlite.connect(self.path)
+            reader.row_factory = aiosqlite.Row
+            await reader.execute("PRAGMA query_only = ON")
+            self.writer, self.reader = writer, reader
+
+    async def close(self):
+        """Close both connections; the caller must hold self.lock."""
+        if self.writer is not None:
+            writer, reader = self.writer, self.reader
+            self.writer = self.reader = None
+            await reader.close()
+            await writer.close()
+
+
+_shards: "OrderedDict[str, _Shard]" = OrderedDict()
+
+
+def _get_shard(warehouse: str) -> _Shard:
+    shard = _shards.get(warehouse)
+    if shard is None:
+        shard = _shards[warehouse] = _Shard(warehouse)
+    _shards.move_to_end(warehouse)
+    return shard
+
+
+async def _evict_idle_shards():
+    """Close least recently used idle shards until at most MAX_OPEN_SHARDS stay open."""
+    open_shards = [s for s in _shards.values() if s.is_open]
+    excess = len(open_shards) - MAX_OPEN_SHARDS
+    for shard in open_shards:
+        if excess <= 0:
+            break
+        if shard.users or shard.lock.locked():
+            continue
+        async with shard.lock:
+            if shard.users == 0 and shard.is_open:
+                await shard.close()
+                excess -= 1
+
+
+@asynccontextmanager
+async def _connection(warehouse: str, write: bool = False, create: bool = False):
+    """
+    Yield a connection of a warehouse shard.
+
+    Writes get the writer connection, serialized per shard; reads get the
+    read-only connection without waiting for writers. Only create=True may
+    create the shard file of a new warehouse.
+    """
+    validate_warehouse(warehouse)
+    if not create and not warehouse_exists(warehouse):
+        raise LookupError(f"Depo bulunamadı: '{warehouse}'")
+    shard = _get_shard(warehouse)
+    shard.users += 1
     try:
-        await db.executescript(SCHEMA)
-        await db.commit()
+        if write:
+            async with shard.lock:
+                await shard.open()
+                yield shard.writer
+        else:
+            # Readers only need the lock to open the shard, not to wait out a write
+            if not shard.is_open:
+                async with shard.lock:
+                    await shard.open()
+            yield shard.reader
     finally:
-        await db.close()
+        shard.users -= 1
+        await _evict_idle_shards()
 
 
-async def add_item(item_name: str, location: str, quantity: int = 1) -> dict:
-    """Add an item to the inventory."""
-    db = await get_db()
-    try:
-        cursor = await db.execute(
-            "INSERT INTO inventory (item_name, location, quantity) VALUES (?, ?, ?)",
-            (item_name, location, quantity),
+def _row(row: aiosqlite.Row, warehouse: str) -> dict:
+    item = dict(row)
+    item["warehouse"] = warehouse
+    return item
+
+
+def list_warehouses() -> list[str]:
+    """Return every existing warehouse: the default, open shards and files in DATABASE_DIR."""
+    found = set(_shards)
+    if warehouse_exists(DEFAULT_WAREHOUSE):
+        found.add(DEFAULT_WAREHOUSE)
+    if os.path.isdir(DATABASE_DIR):
+        for name in os.listdir(DATABASE_DIR):
+            stem, ext = os.path.splitext(name)
+            if ext == ".db" and _WAREHOUSE_RE.match(stem):
+                found.add(stem)
+    return sorted(found)
+
+
+async def _fan_out(query, *args) -> list[dict]:
+    """Run a per-shard read on every warehouse concurrently and merge by last_updated."""
+    results = await asyncio.gather(
+        *(query(*args, warehouse=w) for w in list_warehouses())
+    )
+    return list(heapq.merge(*results, key=lambda i: i["last_updated"], reverse=True))
+
+
+def _dumps(items: list[dict]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(items)
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def _fetch_json(warehouse: str, where: str = "", params: tuple = ()) -> bytes:
+    """Return matching rows of one shard as a JSON array serialized by SQLite itself."""
+    if _AGGREGATE_ORDER_BY:
+        query = f"SELECT json_group_array({_ITEM_JSON} ORDER BY last_updated DESC) FROM inventory {where}"
+    else:
+        # Older SQLite has no ORDER BY inside aggregates. It feeds the aggregate in
+        # the subquery's order in practice, but does not guarantee it; a reordered
+        # list is tolerated here since the order is only a display preference.
+        query = (
+            f"SELECT json_group_array({_ITEM_JSON}) FROM "
+            f"(SELECT * FROM inventory {where} ORDER BY last_updated DESC)"
         )
+    async with _connection(warehouse) as db:
+        cursor = await db.execute(query, (warehouse, *params))
+        (payload,) = await cursor.fetchone()
+        return payload.encode()
+
+
+async def _adjust_location(db: aiosqlite.Connection, location: str, items: int, quantity: int):
+    """Apply a delta to a location's aggregate row, inside the caller's transaction."""
+    key = normalize_location(location)
+    await db.execute(
+        "INSERT INTO location_summary (location, item_count, total_quantity) VALUES (?, ?, ?) "
+        "ON CONFLICT(location) DO UPDATE SET "
+        "item_count = item_count + excluded.item_count, "
+        "total_quantity = total_quantity + excluded.total_quantity",
+        (key, items, quantity),
+    )
+    if items < 0:
+        await db.execute("DELETE FROM location_summary WHERE location = ? AND item_count <= 0", (key,))
+
+
+async def _expected_location_summary(db: aiosqlite.Connection) -> dict[str, tuple[int, int]]:
+    """Recompute per-location (item_count, total_quantity) from the inventory table."""
+    expected = {}
+    cursor = await db.execute("SELECT location, quantity FROM inventory")
+    async for location, quantity in cursor:
+        key = normalize_location(location)
+        count, total = expected.get(key, (0, 0))
+        expected[key] = (count + 1, total + (quantity or 0))
+    return expected
+
+
+async def _rebuild_location_summary(db: aiosqlite.Connection, expected: dict[str, tuple[int, int]]):
+    await db.execute("DELETE FROM location_summary")
+    await db.executemany(
+        "INSERT INTO location_summary (location, item_count, total_quantity) VALUES (?, ?, ?)",
+        [(key, count, total) for key, (count, total) in expected.items()],
+    )
+
+
+async def _backfill_location_summary(db: aiosqlite.Connection):
+    """Populate location_summary for databases created before the table existed."""
+    cursor = await db.execute(
+        "SELECT NOT EXISTS (SELECT 1 FROM location_summary) AND EXISTS (SELECT 1 FROM inventory)"
+    )
+    (missing,) = await cursor.fetchone()
+    if missing:
+        await _rebuild_location_summary(db, await _expected_location_summary(db))
+
+
+async def init_db():
+    """Initialize the default warehouse schema."""
+    async with _connection(DEFAULT_WAREHOUSE, write=True, create=True):
+        pass
+
+
+async def close_all():
+    """Close every open shard connection."""
+    for shard in list(_shards.values()):
+        async with shard.lock:
+            await shard.close()
+    _shards.clear()
+
+
+async def add_item(item_name: str, location: str, quantity: int = 1,
+                   warehouse: str = DEFAULT_WAREHOUSE) -> dict:
+    """Add an item to the inventory, creating the warehouse if needed."""
+    async with _connection(warehouse, write=True, create=True) as db:
+        insert = "INSERT INTO inventory (item_name, location, quantity) VALUES (?, ?, ?)"
+        # Every statement is a round trip to the connection thread; RETURNING saves one
+        cursor = await db.execute(insert + " RETURNING *" if _RETURNING else insert,
+                                  (item_name, location, quantity))
+        item = await cursor.fetchone() if _RETURNING else None
+        await _adjust_location(db, location, 1, quantity or 0)
         await db.commit()
-        row = await db.execute("SELECT * FROM inventory WHERE id = ?", (cursor.lastrowid,))
-        item = await row.fetchone()
-        return dict(item)
-    finally:
-        await db.close()
+        if item is None:
+            cursor = await db.execute("SELECT * FROM inventory WHERE id = ?", (cursor.lastrowid,))
+            item = await cursor.fetchone()
+        return _row(item, warehouse)
 
 
-async def get_all_items() -> list[dict]:
-    """Get all inventory items."""
-    db = await get_db()
-    try:
+async def get_all_items(warehouse: str = DEFAULT_WAREHOUSE) -> list[dict]:
+    """Get all inventory items. Use ALL_WAREHOUSES to list every warehouse."""
+    if validate_warehouse(warehouse, allow_all=True) == ALL_WAREHOUSES:
+        return await _fan_out(get_all_items)
+    async with _connection(warehouse) as db:
         cursor = await db.execute("SELECT * FROM inventory ORDER BY last_updated DESC")
         rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        await db.close()
+        return [_row(row, warehouse) for row in rows]
 
 
-async def search_items(query: str) -> list[dict]:
+async def search_items(query: str, warehouse: str = DEFAULT_WAREHOUSE) -> list[dict]:
     """Search items by name or location (case-insensitive, partial match)."""
-    db = await get_db()
-    try:
+    if validate_warehouse(warehouse, allow_all=True) == ALL_WAREHOUSES:
+        return await _fan_out(search_items, query)
+    async with _connection(warehouse) as db:
         like_query = f"%{query}%"
         cursor = await db.execute(
             "SELECT * FROM inventory WHERE item_name LIKE ? OR location LIKE ? ORDER BY last_updated DESC",
             (like_query, like_query),
         )
         rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        await db.close()
+        return [_row(row, warehouse) for row in rows]
+
+
+async def get_all_items_json(warehouse: str = DEFAULT_WAREHOUSE) -> bytes:
+    """Like get_all_items, but returns the response body as JSON bytes."""
+    if validate_warehouse(warehouse, allow_all=True) == ALL_WAREHOUSES:
+        return _dumps(await get_all_items(warehouse))
+    return await _fetch_json(warehouse)
 
 
-async def update_item(item_id: int, item_name: str = None, location: str = None, quantity: int = None) -> dict | None:
+async def search_items_json(query: str, warehouse: str = DEFAULT_WAREHOUSE) -> bytes:
+    """Like search_items, but returns the response body as JSON bytes."""
+    if validate_warehouse(warehouse, allow_all=True) == ALL_WAREHOUSES:
+        return _dumps(await search_items(query, warehouse))
+    like_query = f"%{query}%"
+    return await _fetch_json(warehouse, "WHERE item_name LIKE ? OR location LIKE ?", (like_query, like_query))
+
+
+async def update_item(item_id: int, item_name: str = None, location: str = None, quantity: int = None,
+                      warehouse: str = DEFAULT_WAREHOUSE) -> dict | None:
     """Update an inventory item."""
-    db = await get_db()
-    try:
-        updates = []
-        params = []
-        if item_name is not None:
-            updates.append("item_name = ?")
-            params.append(item_name)
-        if location is not None:
-            updates.append("location = ?")
-            params.append(location)
-        if quantity is not None:
-            updates.append("quantity = ?")
-            params.append(quantity)
-
-        if not updates:
-            return None
-
-        updates.append("last_updated = CURRENT_TIMESTAMP")
-        params.append(item_id)
+    updates = []
+    params = []
+    if item_name is not None:
+        updates.append("item_name = ?")
+        params.append(item_name)
+    if location is not None:
+        updates.append("location = ?")
+        params.append(location)
+    if quantity is not None:
+        updates.append("quantity = ?")
+        params.append(quantity)
+
+    if not updates:
+        return None
+
+    updates.append("last_updated = CURRENT_TIMESTAMP")
+    params.append(item_id)
 
+    async with _connection(warehouse, write=True) as db:
+        cursor = await db.execute("SELECT location, quantity FROM inventory WHERE id = ?", (item_id,))
+        old = await cursor.fetchone()
         await db.execute(
             f"UPDATE inventory SET {', '.join(updates)} WHERE id = ?",
             params,
         )
+        if old is not None:
+            new_location = old["location"] if location is None else location
+            new_quantity = old["quantity"] if quantity is None else quantity
+            await _adjust_location(db, old["location"], -1, -(old["quantity"] or 0))
+            await _adjust_location(db, new_location, 1, new_quantity or 0)
         await db.commit()
 
         cursor = await db.execute("SELECT * FROM inventory WHERE id = ?", (item_id,))
         item = await cursor.fetchone()
-        return dict(item) if item else None
-    finally:
-        await db.close()
+        return _row(item, warehouse) if item else None
 
 
-async def delete_item(item_id: int) -> bool:
+async def delete_item(item_id: int, warehouse: str = DEFAULT_WAREHOUSE) -> bool:
     """Delete an inventory item. Returns True if deleted."""
-    db = await get_db()
-    try:
+    async with _connection(warehouse, write=True) as db:
+        cursor = await db.execute("SELECT location, quantity FROM inventory WHERE id = ?", (item_id,))
+        old = await cursor.fetchone()
         cursor = await db.execute("DELETE FROM inventory WHERE id = ?", (item_id,))
+        if old is not None:
+            await _adjust_location(db, old["location"], -1, -(old["quantity"] or 0))
         await db.commit()
         return cursor.rowcount > 0
-    finally:
-        await db.close()
+
+
+async def get_location_summary(location: str, warehouse: str = DEFAULT_WAREHOUSE) -> dict:
+    """Item count and total quantity at a location, read from location_summary."""
+    if validate_warehouse(warehouse, allow_all=True) == ALL_WAREHOUSES:
+        results = await asyncio.gather(
+            *(get_location_summary(location, warehouse=w) for w in list_warehouses())
+        )
+        return {
+            "location": normalize_location(location),
+            "item_count": sum(r["item_count"] for r in results),
+            "total_quantity": sum(r["total_quantity"] for r in results),
+            "warehouse": ALL_WAREHOUSES,
+        }
+    key = normalize_location(location)
+    async with _connection(warehouse) as db:
+        cursor = await db.execute("SELECT * FROM location_summary WHERE location = ?", (key,))
+        row = await cursor.fetchone()
+        if row is None:
+            return {"location": key, "item_count": 0, "total_quantity": 0, "warehouse": warehouse}
+        return _row(row, warehouse)
+
+
+async def known_locations(locations: list[str], warehouse: str = DEFAULT_WAREHOUSE) -> set[str]:
+    """The location keys among the given locations that have items in the warehouse."""
+    if validate_warehouse(warehouse, allow_all=True) == ALL_WAREHOUSES:
+        results = await asyncio.gather(
+            *(known_locations(locations, warehouse=w) for w in list_warehouses())
+        )
+        return set().union(*results)
+    keys = list({normalize_location(location) for location in locations})
+    if not keys:
+        return set()
+    async with _connection(warehouse) as db:
+        cursor = await db.execute(
+            f"SELECT location FROM location_summary WHERE location IN ({', '.join('?' * len(keys))})",
+            keys,
+        )
+        return {location async for (location,) in cursor}
+
+
+async def list_location_summaries(warehouse: str = DEFAULT_WAREHOUSE) -> list[dict]:
+    """All per-location aggregates, busiest locations first."""
+    if validate_warehouse(warehouse, allow_all=True) == ALL_WAREHOUSES:
+        results = await asyncio.gather(
+            *(list_location_summaries(warehouse=w) for w in list_warehouses())
+        )
+        return sorted((r for rows in results for r in rows), key=lambda r: -r["item_count"])
+    async with _connection(warehouse) as db:
+        cursor = await db.execute("SELECT * FROM location_summary ORDER BY item_count DESC, location")
+        rows = await cursor.fetchall()
+        return [_row(row, warehouse) for row in rows]
+
+
+def _counts(summary: dict[str, tuple[int, int]], key: str) -> dict:
+    count, total = summary.get(key, (0, 0))
+    return {"item_count": count, "total_quantity": total}
+
+
+async def check_location_summary(warehouse: str = DEFAULT_WAREHOUSE, repair: bool = False) -> dict:
+    """
+    Compare location_summary with aggregates recomputed from inventory.
+
+    Returns the mismatching locations; with repair=True the table is rebuilt
+    from inventory when they differ.
+    """
+    async with _connection(warehouse, write=True) as db:
+        expected = await _expected_location_summary(db)
+        cursor = await db.execute("SELECT location, item_count, total_quantity FROM location_summary")
+        actual = {location: (count, total) async for location, count, total in cursor}
+
+        mismatches = [
+            {"location": key, "expected": _counts(expected, key), "actual": _counts(actual, key)}
+            for key in sorted(expected.keys() | actual.keys())
+            if expected.get(key) != actual.get(key)
+        ]
+        repaired = False
+        if mismatches and repair:
+            await _rebuild_location_summary(db, expected)
+            await db.commit()
+            repaired = True
+        return {
+            "warehouse": warehouse,
+            "consistent": not mismatches,
+            "mismatches": mismatches,
+            "repaired": repaired,
+        }
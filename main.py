@@ -5,9 +5,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from routers import inventory, chat
+from routers import inventory, admin
+from config import REST_ONLY
+from profiling import ProfilingMiddleware
 import database
 
+if not REST_ONLY:
+    from routers import chat
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,12 +29,18 @@ async def lifespan(app: FastAPI):
     await database.init_db()
     logger.info("Database ready.")
 
-    # Pre-load NLU models in background (optional, lazy-loads on first request)
-    logger.info("NLU models will be loaded on first request.")
+    if REST_ONLY:
+        logger.info("REST-only mode: chat endpoint and NLU models are disabled.")
+    else:
+        # Load the NLU models before accepting requests, outside the per-request deadline
+        await chat.warm_up()
 
     yield
 
     # Shutdown
+    if not REST_ONLY:
+        chat.limiter.shutdown()
+    await database.close_all()
     logger.info("Application shutting down.")
 
 
@@ -49,9 +60,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profiling hooks — a no-op unless enabled via /api/admin/profiling
+app.add_middleware(ProfilingMiddleware)
+
 # Routers
 app.include_router(inventory.router)
-app.include_router(chat.router)
+app.include_router(admin.router)
+if not REST_ONLY:
+    app.include_router(chat.router)
 
 # Static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
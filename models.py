@@ -1,6 +1,6 @@
 """Pydantic models for request/response schemas."""
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 
@@ -24,12 +24,14 @@ class InventoryItem(BaseModel):
     location: str
     quantity: int
     last_updated: str
+    warehouse: str
 
 
 # --- Chat / NLU ---
 
 class ChatRequest(BaseModel):
     message: str
+    warehouse: Optional[str] = None
 
 
 class NLUResult(BaseModel):
@@ -37,9 +39,19 @@ class NLUResult(BaseModel):
     confidence: float
     entities: dict
     normalized_text: str
+    degraded: bool = False
 
 
 class ChatResponse(BaseModel):
     reply: str
     nlu: Optional[NLUResult] = None
     data: Optional[list] = None
+
+
+# --- Admin / Profiling ---
+
+class ProfilingSettings(BaseModel):
+    requests: int = 0
+    mode: Literal["sample", "cprofile"] = "sample"
+    slow_ms: Optional[float] = None
+    trace_memory: bool = False
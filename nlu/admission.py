@@ -0,0 +1,112 @@
+"""Admission control for blocking NLU inference.
+
+Transformer calls run on a dedicated thread pool so they never block the event
+loop (and with it the REST inventory endpoints). At most `max_concurrency`
+calls run at once, at most `max_queue` requests may wait for a slot, and every
+request has a deadline covering both the wait and the inference itself.
+Anything beyond that is rejected immediately with InferenceOverloaded.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceOverloaded(Exception):
+    """Raised when a request is shed instead of waiting for inference."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class InferenceLimiter:
+    """Bounded-concurrency, bounded-queue runner for blocking inference calls."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="nlu")
+        self._semaphore = None
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.degraded = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def saturated(self) -> bool:
+        """True when a new request would be rejected for queue depth."""
+        return self._get_semaphore().locked() and self.queued >= self.max_queue
+
+    async def run(self, fn, *args):
+        """
+        Run `fn(*args)` on the inference pool.
+
+        Raises InferenceOverloaded if the queue is full or the deadline passes
+        before the call completes. A call that times out keeps its slot until
+        the worker thread actually finishes, so the concurrency cap holds.
+        """
+        deadline = time.monotonic() + self.timeout
+        semaphore = self._get_semaphore()
+
+        if semaphore.locked():
+            if self.queued >= self.max_queue:
+                self.shed_queue_full += 1
+                raise InferenceOverloaded("queue_full")
+            self.queued += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                self.shed_timeout += 1
+                raise InferenceOverloaded("queue_timeout")
+            finally:
+                self.queued -= 1
+        else:
+            await semaphore.acquire()
+
+        self.in_flight += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+        def _release(_):
+            self.in_flight -= 1
+            semaphore.release()
+
+        future.add_done_callback(_release)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self.shed_timeout += 1
+            raise InferenceOverloaded("deadline_exceeded")
+        # Only calls answered within the deadline count; shed ones are in shed_timeout
+        self.completed += 1
+        return result
+
+    async def warm_up(self, fn, *args):
+        """Run `fn(*args)` on the inference pool without a deadline, e.g. to load models at startup."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "saturated": self.saturated(),
+            "completed": self.completed,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "degraded": self.degraded,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "timeout": self.timeout,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
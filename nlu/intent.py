@@ -1,24 +1,27 @@
 """Intent detection using zero-shot classification with Turkish DistilBERT."""
 import logging
-from transformers import pipeline
-from config import ZERO_SHOT_LABELS, LABEL_TO_INTENT
+import threading
+from config import ZERO_SHOT_LABELS, LABEL_TO_INTENT, INTENT_LABELS
 
 logger = logging.getLogger(__name__)
 
 _classifier = None
+_classifier_lock = threading.Lock()
 
 
 def _get_classifier():
     """Lazy-load the zero-shot classification pipeline."""
     global _classifier
     if _classifier is None:
-        logger.info("Loading zero-shot classification model (this may take a moment)...")
-        _classifier = pipeline(
-            "zero-shot-classification",
-            model="emrecan/bert-base-turkish-cased-mean-nli-stsb-tr",
-            device=-1,  # CPU
-        )
-        logger.info("Zero-shot classification model loaded.")
+        # Several inference threads may get here at once; load the model only once
+        with _classifier_lock:
+            if _classifier is None:
+                # Imported here so torch/transformers only load when inference is needed
+                from nlu.registry import load_pipeline
+
+                logger.info("Loading zero-shot classification model (this may take a moment)...")
+                _classifier = load_pipeline("intent")
+                logger.info("Zero-shot classification model loaded.")
     return _classifier
 
 
@@ -50,3 +53,25 @@ def detect_intent(text: str) -> dict:
         "confidence": round(top_score, 4),
         "label": top_label,
     }
+
+
+def detect_intent_keywords(text: str) -> dict:
+    """
+    Cheap keyword-based intent detection using INTENT_LABELS.
+
+    Used as a degraded fallback when the zero-shot model is unavailable or
+    overloaded. The longest matching keyword wins, so "envantere ekle" beats
+    "envanter". Returns the same shape as detect_intent.
+    """
+    text_lower = text.lower()
+    best_intent, best_keyword = "unknown", ""
+    for intent, keywords in INTENT_LABELS.items():
+        for keyword in keywords:
+            if keyword in text_lower and len(keyword) > len(best_keyword):
+                best_intent, best_keyword = intent, keyword
+
+    return {
+        "intent": best_intent,
+        "confidence": 0.5 if best_keyword else 0.0,
+        "label": best_keyword,
+    }
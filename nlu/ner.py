@@ -1,24 +1,27 @@
 """Named Entity Recognition for Turkish text."""
 import logging
-from transformers import pipeline
+import threading
+from nlu.normalizer import DATIVE, LOCATIVE, split_case
 
 logger = logging.getLogger(__name__)
 
 _ner_pipeline = None
+_ner_lock = threading.Lock()
 
 
 def _get_ner():
     """Lazy-load the Turkish NER pipeline."""
     global _ner_pipeline
     if _ner_pipeline is None:
-        logger.info("Loading Turkish NER model (this may take a moment)...")
-        _ner_pipeline = pipeline(
-            "ner",
-            model="akdeniz27/bert-base-turkish-cased-ner",
-            aggregation_strategy="simple",
-            device=-1,  # CPU
-        )
-        logger.info("Turkish NER model loaded.")
+        # Several inference threads may get here at once; load the model only once
+        with _ner_lock:
+            if _ner_pipeline is None:
+                # Imported here so torch/transformers only load when inference is needed
+                from nlu.registry import load_pipeline
+
+                logger.info("Loading Turkish NER model (this may take a moment)...")
+                _ner_pipeline = load_pipeline("ner", aggregation_strategy="simple")
+                logger.info("Turkish NER model loaded.")
     return _ner_pipeline
 
 
@@ -59,10 +62,11 @@ def extract_entities(text: str) -> dict:
     return entities
 
 
-def extract_item_and_location(text: str) -> dict:
+def extract_item_and_location(text: str, use_ner: bool = True) -> dict:
     """
     Heuristic entity extraction for inventory commands.
     Falls back to pattern matching if NER doesn't find entities.
+    With use_ner=False only the pattern matching runs (no model call).
 
     Tries to extract:
         - item_name: the thing being added/searched
@@ -72,24 +76,27 @@ def extract_item_and_location(text: str) -> dict:
         "X'i Y'e koy" -> item=X, location=Y
         "X ekle" -> item=X
         "X nerede" -> item=X
+        "X'ta ne var" -> location=X
     """
     # First try NER
-    ner_entities = extract_entities(text)
+    ner_entities = extract_entities(text) if use_ner else {}
 
     item = ner_entities.get("item")
     location = ner_entities.get("location")
+    location_suffix = None
 
     # Fallback: simple heuristic parsing for common Turkish patterns
     if not item or not location:
-        item_fb, loc_fb = _heuristic_parse(text)
+        item_fb, loc_fb, suffix_fb = _heuristic_parse(text)
         if not item:
             item = item_fb
         if not location:
-            location = loc_fb
+            location, location_suffix = loc_fb, suffix_fb
 
     return {
         "item": item,
         "location": location,
+        "location_suffix": location_suffix,
         "raw_entities": ner_entities.get("raw_entities", []),
     }
 
@@ -97,17 +104,21 @@ def extract_item_and_location(text: str) -> dict:
 def _heuristic_parse(text: str) -> tuple:
     """
     Simple heuristic to extract item and location from Turkish commands.
+    Returns (item, location, location_suffix), where location_suffix is the
+    dative/locative ending split off the location ("" if none was).
 
     Patterns:
         "{item}'i/yı/yi/ını {location}'a/e/ya/ye koy/ekle/yerleştir"
         "{item} ekle"
         "{item} nerede"
+        "{location}da/de/ta/te ne var"
     """
     import re
 
     text_lower = text.lower().strip()
     item = None
     location = None
+    suffix = ""
 
     # Pattern: "X'yi/yı/ı/i Y'ye/ya/a/e koy/ekle/yerleştir/kaydet"
     # e.g., "Mavi dosyayı üst rafa koy"
@@ -136,8 +147,27 @@ def _heuristic_parse(text: str) -> tuple:
                     location = " ".join(tokens[mid:])
             elif len(tokens) == 1:
                 item = tokens[0]
+            if location:
+                location, suffix = split_case(location, DATIVE)
             break
 
+    # Pattern: "X'ta ne var" / "X'te kaç ürün var" -> location=X
+    # "kaç" questions also ask about items ("vida kaç tane var"), so there X is
+    # only a location with an explicit locative ending; the caller may still
+    # find the item phrase among the warehouse's locations
+    if not item and not location:
+        match = re.match(r"(.+?)\s+(ne|neler|kaç ürün|kaç tane)\s+var", text_lower)
+        if match:
+            phrase = match.group(1).strip()
+            if match.group(2).startswith("kaç"):
+                stem, suffix = split_case(phrase, LOCATIVE, nouns=frozenset())
+                if suffix:
+                    location = stem
+                else:
+                    item = phrase
+            else:
+                location, suffix = split_case(phrase, LOCATIVE)
+
     # Pattern: "X nerede" / "X nerede?"
     if not item:
         match = re.match(r"(.+?)\s+nerede", text_lower)
@@ -153,10 +183,10 @@ def _heuristic_parse(text: str) -> tuple:
     # Clean up suffixes from extracted item
     if item:
         item = _clean_suffix(item)
-    if location:
+    if location and not suffix:
         location = _clean_suffix(location)
 
-    return item, location
+    return item, location, suffix if location else None
 
 
 def _clean_suffix(text: str) -> str:
@@ -166,3 +196,4 @@ def _clean_suffix(text: str) -> str:
     # But be careful not to remove too much
     text = re.sub(r"[''](?:y[ıiuü]|n[ıiuü]|[ıiuü]|y[ae]|n[ae]|d[ae]n?|t[ae]n?)$", "", text)
     return text.strip()
+
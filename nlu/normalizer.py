@@ -1,22 +1,27 @@
 """Turkish text normalization using Zeyrek morphological analyzer."""
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 _analyzer = None
+_analyzer_lock = threading.Lock()
 
 
 def _get_analyzer():
     """Lazy-load the Zeyrek analyzer."""
     global _analyzer
     if _analyzer is None:
-        try:
-            import zeyrek
-            _analyzer = zeyrek.MorphAnalyzer()
-            logger.info("Zeyrek morphological analyzer loaded.")
-        except Exception as e:
-            logger.warning(f"Zeyrek loading failed: {e}. Normalization will be disabled.")
-            _analyzer = False  # Mark as failed so we don't retry
+        # Several inference threads may get here at once; build the analyzer only once
+        with _analyzer_lock:
+            if _analyzer is None:
+                try:
+                    import zeyrek
+                    _analyzer = zeyrek.MorphAnalyzer()
+                    logger.info("Zeyrek morphological analyzer loaded.")
+                except Exception as e:
+                    logger.warning(f"Zeyrek loading failed: {e}. Normalization will be disabled.")
+                    _analyzer = False  # Mark as failed so we don't retry
     return _analyzer
 
 
@@ -56,3 +61,107 @@ def normalize_for_search(text: str) -> str:
     - Strip extra whitespace
     """
     return lemmatize(text).strip()
+
+
+def normalize_location(text: str) -> str:
+    """
+    Normalize a location name into the key used by location_summary:
+    Turkish-aware lowercasing ("I" -> "ı", "İ" -> "i") and single spaces.
+    E.g., "Üst  RAF" -> "üst raf"
+    """
+    text = text.replace("I", "ı").replace("İ", "i")
+    return " ".join(text.lower().split())
+
+
+DATIVE = "dative"
+LOCATIVE = "locative"
+
+# Head nouns of common storage locations. A case ending is only split off a
+# word without an apostrophe when what remains is one of these (or a location
+# the warehouse already has): "rafa" -> "raf", while "masa", "Ankara" and
+# "Bölge" end in -a/-e without being datives.
+LOCATION_NOUNS = frozenset({
+    "alan", "ambar", "arşiv", "bölme", "bölüm", "çekmece", "dolap", "göz",
+    "kasa", "kat", "kolon", "koridor", "kutu", "masa", "oda", "palet", "raf",
+    "reyon", "sepet", "sıra", "tezgah", "vitrin",
+})
+
+_CASE_SUFFIXES = {
+    DATIVE: ("a", "e", "ya", "ye", "na", "ne"),
+    LOCATIVE: ("da", "de", "ta", "te", "nda", "nde"),
+}
+_VOWELS = "aeıioöuü"
+_HIGH_VOWELS = "ıiuü"
+# Final consonants softened before a vowel-initial suffix: dolap -> dolaba
+_SOFTENED = {"b": "p", "c": "ç", "d": "t", "ğ": "k"}
+
+
+def _possessed(word: str) -> str:
+    """Drop a third-person possessive ending: "rafı" -> "raf", "masası" -> "masa"."""
+    if len(word) >= 4 and word[-2] == "s" and word[-3] in _VOWELS:
+        return word[:-2]
+    return word[:-1]
+
+
+def _readings(word: str, case: str) -> list[tuple[str, str, str, bool]]:
+    """
+    Possible (stem, suffix, head noun, explicit) splits of a word in the given
+    case, most specific first. Explicit splits are marked unambiguously (an
+    apostrophe, or the possessive locative -ında); the others need a known head.
+    """
+    key = normalize_location(word)
+    for mark in ("'", "’"):
+        if mark in word:
+            stem, _, suffix = word.partition(mark)
+            if suffix.lower() in _CASE_SUFFIXES[case]:
+                return [(stem, mark + suffix, normalize_location(stem), True)]
+            return []
+
+    readings = []
+    if case == DATIVE:
+        if len(key) >= 5 and key[-2:] in ("na", "ne") and key[-3] in _HIGH_VOWELS:
+            readings.append((word[:-2], word[-2:], _possessed(key[:-2]), False))
+        if len(key) >= 4 and key[-2:] in ("ya", "ye") and key[-3] in _VOWELS:
+            readings.append((word[:-2], word[-2:], key[:-2], False))
+        if len(key) >= 3 and key[-1] in "ae" and key[-2] not in _VOWELS:
+            stem = word[:-2] + _SOFTENED.get(key[-2], word[-2])
+            readings.append((stem, word[-1], normalize_location(stem), False))
+    else:
+        if len(key) >= 6 and key[-3:] in ("nda", "nde") and key[-4] in _HIGH_VOWELS:
+            readings.append((word[:-3], word[-3:], _possessed(key[:-3]), True))
+        if len(key) >= 4 and key[-2:] in ("da", "de", "ta", "te"):
+            readings.append((word[:-2], word[-2:], key[:-2], False))
+    return readings
+
+
+def case_stems(text: str, case: str) -> list[str]:
+    """
+    Every reading of a location phrase without a case ending on its last
+    word, e.g. for checking them against the locations a warehouse has:
+        case_stems("üst rafta", LOCATIVE) -> ["üst raf"]
+    """
+    words = text.split()
+    if not words:
+        return []
+    return [" ".join(words[:-1] + [stem]) for stem, _, _, _ in _readings(words[-1], case)]
+
+
+def split_case(text: str, case: str, known: frozenset = frozenset(),
+               nouns: frozenset = LOCATION_NOUNS) -> tuple[str, str]:
+    """
+    Split a dative ("Y'ye koy") or locative ("X'te ne var") ending off the last
+    word of a location phrase. Returns (phrase, suffix); the suffix is empty
+    and the phrase unchanged unless the ending is explicit, or the head noun
+    is in nouns, or the stem's location key is in known:
+        "üst rafa" -> ("üst raf", "a"), "A1 rafında" -> ("A1 rafı", "nda"),
+        "dolaba" -> ("dolap", "a"), "B2'ye" -> ("B2", "'ye"),
+        "masa" -> ("masa", ""), "vida" -> ("vida", "")
+    """
+    words = text.split()
+    if not words:
+        return text, ""
+    for stem, suffix, head, explicit in _readings(words[-1], case):
+        phrase = " ".join(words[:-1] + [stem])
+        if explicit or head in nouns or normalize_location(phrase) in known:
+            return phrase, suffix
+    return text, ""
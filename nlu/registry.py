@@ -0,0 +1,194 @@
+"""Local model registry: versioned, offline snapshots of the NLU models.
+
+Layout under MODEL_DIR:
+
+    <key>/<version>/            save_pretrained output (safetensors weights)
+    <key>/<version>/manifest.json
+    <key>/CURRENT               name of the active version
+
+Snapshots are loaded with local_files_only=True, so no Hub resolution happens
+at startup. Weights are safetensors, which are read through mmap instead of
+being unpickled, and low_cpu_mem_usage avoids building a randomly initialized
+copy of the model first.
+
+CLI:
+    python -m nlu.registry snapshot intent ner [--version V]
+    python -m nlu.registry list
+    python -m nlu.registry use intent <version>
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from config import INTENT_MODEL, NER_MODEL, MODEL_DIR, MODEL_OFFLINE
+
+logger = logging.getLogger(__name__)
+
+# key -> (configured model, pipeline task, transformers auto class)
+MODELS = {
+    "intent": (INTENT_MODEL, "zero-shot-classification", "AutoModelForSequenceClassification"),
+    "ner": (NER_MODEL, "ner", "AutoModelForTokenClassification"),
+}
+
+
+def _model_root(key: str) -> str:
+    return os.path.join(MODEL_DIR, key)
+
+
+def _read_manifest(path: str) -> dict:
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_versions(key: str) -> list[dict]:
+    """Return manifests of every snapshot of a model, oldest first."""
+    root = _model_root(key)
+    if not os.path.isdir(root):
+        return []
+    versions = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if os.path.isfile(os.path.join(path, "manifest.json")):
+            versions.append(_read_manifest(path))
+    return versions
+
+
+def current_version(key: str) -> str | None:
+    try:
+        with open(os.path.join(_model_root(key), "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def use_version(key: str, version: str):
+    """Make `version` the active snapshot of a model."""
+    path = os.path.join(_model_root(key), version)
+    if not os.path.isfile(os.path.join(path, "manifest.json")):
+        raise ValueError(f"No snapshot '{version}' for model '{key}'")
+    tmp = os.path.join(_model_root(key), "CURRENT.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(_model_root(key), "CURRENT"))
+
+
+def resolve(key: str) -> str | None:
+    """
+    Return a local directory to load a model from, or None to use the Hub.
+
+    A configured local path is used as is. A Hub ID resolves to the active
+    registry snapshot, as long as that snapshot was taken from the same ID.
+    """
+    model_ref = MODELS[key][0]
+    if os.path.isdir(model_ref):
+        return model_ref
+
+    version = current_version(key)
+    if version:
+        path = os.path.join(_model_root(key), version)
+        try:
+            manifest = _read_manifest(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Registry snapshot '{key}/{version}' is missing or unreadable ({e}), ignoring it.")
+            return None
+        if manifest.get("source") == model_ref:
+            return path
+        logger.warning(f"Registry snapshot '{key}/{version}' is not of {model_ref}, ignoring it.")
+    return None
+
+
+def snapshot(key: str, version: str | None = None) -> str:
+    """Download a model and save it as a new registry version; returns its path."""
+    import transformers
+
+    model_ref, task, auto_class = MODELS[key]
+    logger.info(f"Snapshotting {model_ref} ({task})...")
+    model = getattr(transformers, auto_class).from_pretrained(model_ref)
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_ref)
+
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    target = os.path.join(_model_root(key), version)
+    if os.path.exists(target):
+        raise ValueError(f"Snapshot '{key}/{version}' already exists")
+
+    tmp = target + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    model.save_pretrained(tmp, safe_serialization=True)
+    tokenizer.save_pretrained(tmp)
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "key": key,
+            "version": version,
+            "source": model_ref,
+            "revision": getattr(model.config, "_commit_hash", None),
+            "task": task,
+            "transformers": transformers.__version__,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, target)
+    use_version(key, version)
+    logger.info(f"Saved {model_ref} as {target}")
+    return target
+
+
+def load_pipeline(key: str, **kwargs):
+    """Build the transformers pipeline for a model, preferring the local registry."""
+    model_ref, task, auto_class = MODELS[key]
+    path = resolve(key)
+    if path is None and MODEL_OFFLINE:
+        raise RuntimeError(
+            f"MODEL_OFFLINE is set but no local snapshot of {model_ref} exists. "
+            f"Run: python -m nlu.registry snapshot {key}"
+        )
+
+    import transformers
+
+    if path is None:
+        logger.info(f"No local snapshot for '{key}', loading {model_ref} from the Hub cache.")
+        return transformers.pipeline(task, model=model_ref, device=-1, **kwargs)
+
+    logger.info(f"Loading '{key}' from {path}")
+    model = getattr(transformers, auto_class).from_pretrained(
+        path, local_files_only=True, use_safetensors=True, low_cpu_mem_usage=True,
+    )
+    tokenizer = transformers.AutoTokenizer.from_pretrained(path, local_files_only=True)
+    return transformers.pipeline(task, model=model, tokenizer=tokenizer, device=-1, **kwargs)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(prog="python -m nlu.registry", description="Local NLU model registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    snap = sub.add_parser("snapshot", help="download models into a new version")
+    snap.add_argument("keys", nargs="*", metavar="key", help=f"models to snapshot: {', '.join(sorted(MODELS))} (default: all)")
+    snap.add_argument("--version", default=None)
+
+    sub.add_parser("list", help="list snapshots")
+
+    use = sub.add_parser("use", help="activate a snapshot version")
+    use.add_argument("key", choices=sorted(MODELS))
+    use.add_argument("version")
+
+    args = parser.parse_args()
+    if args.command == "snapshot":
+        unknown = set(args.keys) - set(MODELS)
+        if unknown:
+            parser.error(f"unknown model(s): {', '.join(sorted(unknown))}")
+        for key in args.keys or sorted(MODELS):
+            print(snapshot(key, args.version))
+    elif args.command == "list":
+        for key in sorted(MODELS):
+            active = current_version(key)
+            print(f"{key}: {MODELS[key][0]}")
+            for manifest in list_versions(key):
+                marker = "*" if manifest["version"] == active else " "
+                print(f"  {marker} {manifest['version']}  {manifest['source']}  rev={manifest.get('revision')}")
+    elif args.command == "use":
+        use_version(args.key, args.version)
+
+
+if __name__ == "__main__":
+    main()
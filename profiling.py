@@ -0,0 +1,264 @@
+"""On-demand request profiling and slow-request capture.
+
+ProfilingMiddleware watches requests to /api/chat and /api/inventory. While
+profiling is off it costs one attribute check per request. An admin can:
+
+- arm it for the next N requests, in "sample" mode (a background thread samples
+  the stacks of every thread, so NLU work on the inference pool and SQLite work
+  on aiosqlite threads show up) or "cprofile" mode (deterministic profile of
+  the event loop thread; one request at a time, other requests interleaved on
+  the loop are included and executor threads are not), and/or
+- set a latency threshold: every watched request is then sampled and the ones
+  slower than the threshold are kept.
+
+Captures, optionally with the memory allocated during the request (tracemalloc,
+only running while profiling is active), go to a bounded ring buffer. Reports
+are rendered off the event loop.
+"""
+import asyncio
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from config import PROFILE_BUFFER_SIZE, PROFILE_SAMPLE_INTERVAL, SLOW_REQUEST_MS
+
+PROFILED_PREFIXES = ("/api/chat", "/api/inventory")
+MODES = ("sample", "cprofile")
+
+_MAX_STACKS = 500
+_MAX_PSTATS_LINES = 60
+_MAX_MEMORY_LINES = 25
+
+
+class _Sampler:
+    """Samples the stacks of all threads while at least one session is open."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sessions: list[Counter] = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self) -> Counter:
+        session = Counter()
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+                self._thread.start()
+        return session
+
+    def stop(self, session: Counter):
+        with self._lock:
+            self._sessions.remove(session)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                sessions = list(self._sessions)
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = _collapse(names.get(ident, str(ident)), frame)
+                for session in sessions:
+                    session[stack] += 1
+            time.sleep(self.interval)
+
+
+def _collapse(thread_name: str, frame) -> str:
+    """Render a stack in collapsed format (root first, ';'-separated)."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.append(thread_name)
+    return ";".join(reversed(parts))
+
+
+class Profiler:
+    """Profiling switches plus the ring buffer of captured profiles."""
+
+    def __init__(self):
+        self.active = False
+        self.mode = "sample"
+        self.remaining = 0
+        self.slow_ms = SLOW_REQUEST_MS
+        self.trace_memory = False
+        self.captures: deque = deque(maxlen=PROFILE_BUFFER_SIZE)
+        self._ids = itertools.count(1)
+        self._sampler = _Sampler(PROFILE_SAMPLE_INTERVAL)
+        self._cprofile_busy = False
+        self._in_flight = 0
+        self._tracing = False
+        self._refresh()
+
+    def _refresh(self):
+        self.active = self.remaining > 0 or self.slow_ms is not None
+        if self.trace_memory and self.active and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        elif not self.active and not self._in_flight:
+            # tracemalloc slows every allocation; stop it once the last profiled request is done
+            self.trace_memory = False
+            if self._tracing:
+                self._tracing = False
+                tracemalloc.stop()
+
+    def configure(self, requests: int = 0, mode: str = "sample",
+                  slow_ms: float | None = None, trace_memory: bool = False):
+        """Arm profiling for the next `requests` requests and set the slow-request threshold."""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.mode = mode
+        self.remaining = max(requests, 0)
+        self.slow_ms = slow_ms
+        self.trace_memory = trace_memory
+        if not trace_memory and self._tracing:
+            self._tracing = False
+            tracemalloc.stop()
+        self._refresh()
+
+    def disable(self):
+        self.configure(requests=0, slow_ms=None, trace_memory=False)
+
+    def state(self) -> dict:
+        return {
+            "active": self.active,
+            "mode": self.mode,
+            "remaining": self.remaining,
+            "slow_ms": self.slow_ms,
+            "trace_memory": self.trace_memory,
+            "captures": len(self.captures),
+            "buffer_size": self.captures.maxlen,
+        }
+
+    def get(self, capture_id: int) -> dict | None:
+        for capture in self.captures:
+            if capture["id"] == capture_id:
+                return capture
+        return None
+
+    def summaries(self) -> list[dict]:
+        keys = ("id", "reason", "method", "path", "status", "duration_ms", "started", "mode")
+        return [{k: c[k] for k in keys} for c in self.captures]
+
+    async def profile(self, app, scope, receive, send):
+        """Run a request under profiling and keep the capture if it qualifies."""
+        armed = self.remaining > 0
+        self._in_flight += 1
+        if armed:
+            self.remaining -= 1
+            self._refresh()
+
+        status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        profile = None
+        if armed and self.mode == "cprofile" and not self._cprofile_busy:
+            self._cprofile_busy = True
+            profile = cProfile.Profile()
+        samples = self._sampler.start() if profile is None else None
+        memory = tracemalloc.take_snapshot() if self.trace_memory and tracemalloc.is_tracing() else None
+
+        started = time.time()
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            await app(scope, receive, send_wrapper)
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._cprofile_busy = False
+            else:
+                self._sampler.stop(samples)
+            duration_ms = (time.perf_counter() - start) * 1000
+
+            slow = self.slow_ms is not None and duration_ms >= self.slow_ms
+            try:
+                if armed or slow:
+                    # Only what was allocated during this request, not everything since tracing began
+                    tracing = memory is not None and tracemalloc.is_tracing()
+                    memory = (memory, tracemalloc.take_snapshot()) if tracing else None
+                    capture = self._capture(
+                        reason="armed" if armed else "slow",
+                        scope=scope,
+                        status=status["code"],
+                        started=started,
+                        duration_ms=duration_ms,
+                        profile=profile,
+                        samples=samples,
+                    )
+                    # pstats rendering and snapshot diffs can take a while; keep them off the loop
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(None, self._render, capture, profile, memory)
+                    self.captures.append(capture)
+            finally:
+                self._in_flight -= 1
+                self._refresh()
+
+    def _capture(self, reason, scope, status, started, duration_ms, profile, samples) -> dict:
+        return {
+            "id": next(self._ids),
+            "reason": reason,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+            "mode": "cprofile" if profile is not None else "sample",
+            "samples": dict(samples.most_common(_MAX_STACKS)) if samples is not None else None,
+            "pstats": None,
+            "pstats_text": None,
+            "memory": None,
+        }
+
+    @staticmethod
+    def _render(capture: dict, profile, memory):
+        """Fill in the pstats report and the memory allocated between two snapshots."""
+        if profile is not None:
+            profile.create_stats()
+            capture["pstats"] = marshal.dumps(profile.stats)
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(_MAX_PSTATS_LINES)
+            capture["pstats_text"] = out.getvalue()
+        if memory is not None:
+            before, after = memory
+            stats = after.compare_to(before, "lineno")[:_MAX_MEMORY_LINES]
+            capture["memory"] = [str(stat) for stat in stats]
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware routing watched requests through the profiler when it is active."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not profiler.active
+            or scope["type"] != "http"
+            or not scope["path"].startswith(PROFILED_PREFIXES)
+        ):
+            return await self.app(scope, receive, send)
+        await profiler.profile(self.app, scope, receive, send)
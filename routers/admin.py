@@ -0,0 +1,100 @@
+"""Admin endpoints: request profiling, captured profiles and maintenance tasks."""
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import PlainTextResponse
+from models import ProfilingSettings
+from config import ADMIN_TOKEN, DEFAULT_WAREHOUSE, ALL_WAREHOUSES
+from profiling import profiler
+import database
+
+
+def _require_admin(x_admin_token: str = Header(default="")):
+    """Only allow requests carrying ADMIN_TOKEN; hide the endpoints when it is unset."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Yetkisiz")
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(_require_admin)])
+
+
+def _get_capture(capture_id: int) -> dict:
+    capture = profiler.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profil bulunamadı")
+    return capture
+
+
+@router.get("/profiling")
+async def profiling_state():
+    """Current profiling settings."""
+    return profiler.state()
+
+
+@router.post("/profiling")
+async def configure_profiling(settings: ProfilingSettings):
+    """Profile the next N watched requests and/or capture requests slower than slow_ms."""
+    profiler.configure(
+        requests=settings.requests,
+        mode=settings.mode,
+        slow_ms=settings.slow_ms,
+        trace_memory=settings.trace_memory,
+    )
+    return profiler.state()
+
+
+@router.delete("/profiling")
+async def disable_profiling():
+    """Turn all profiling off; captured profiles are kept."""
+    profiler.disable()
+    return profiler.state()
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """List captured profiles, oldest first."""
+    return profiler.summaries()
+
+
+@router.get("/profiles/{capture_id}")
+async def get_profile(capture_id: int):
+    """A captured profile with its stack samples, pstats report and memory snapshot."""
+    capture = _get_capture(capture_id)
+    return {k: v for k, v in capture.items() if k != "pstats"}
+
+
+@router.get("/profiles/{capture_id}/collapsed", response_class=PlainTextResponse)
+async def get_profile_collapsed(capture_id: int):
+    """Stack samples in collapsed format, ready for flamegraph.pl or speedscope."""
+    capture = _get_capture(capture_id)
+    if capture["samples"] is None:
+        raise HTTPException(status_code=404, detail="Bu profil örnekleme içermiyor")
+    return "\n".join(f"{stack} {count}" for stack, count in capture["samples"].items())
+
+
+@router.get("/profiles/{capture_id}/pstats")
+async def get_profile_pstats(capture_id: int):
+    """cProfile data as a .prof file, readable by pstats or snakeviz."""
+    capture = _get_capture(capture_id)
+    if capture["pstats"] is None:
+        raise HTTPException(status_code=404, detail="Bu profil cProfile verisi içermiyor")
+    return Response(
+        capture["pstats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{capture_id}.prof"'},
+    )
+
+
+@router.post("/location-summary/check")
+async def check_location_summary(warehouse: str = DEFAULT_WAREHOUSE, repair: bool = False):
+    """Verify location_summary against the inventory table; rebuild it with repair=true."""
+    try:
+        warehouse = database.validate_warehouse(warehouse, allow_all=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    warehouses = database.list_warehouses() if warehouse == ALL_WAREHOUSES else [warehouse]
+    try:
+        return [await database.check_location_summary(w, repair=repair) for w in warehouses]
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,16 +1,88 @@
 """Chat endpoint: NLU-powered natural language inventory management."""
 import logging
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Response
 from models import ChatRequest, ChatResponse, NLUResult
-from nlu.intent import detect_intent
-from nlu.ner import extract_item_and_location
-from nlu.normalizer import normalize_for_search, lemmatize
+from nlu.admission import InferenceLimiter, InferenceOverloaded
+from nlu.intent import _get_classifier, detect_intent, detect_intent_keywords
+from nlu.ner import _get_ner, extract_item_and_location
+from nlu.normalizer import (
+    DATIVE,
+    LOCATIVE,
+    _get_analyzer,
+    case_stems,
+    normalize_for_search,
+    lemmatize,
+    normalize_location,
+)
+from config import (
+    DEFAULT_WAREHOUSE,
+    ALL_WAREHOUSES,
+    FAST_RESPONSES,
+    INFERENCE_CONCURRENCY,
+    INFERENCE_QUEUE_LIMIT,
+    INFERENCE_TIMEOUT,
+    INFERENCE_RETRY_AFTER,
+    INFERENCE_DEGRADED_MODE,
+)
 import database
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
+limiter = InferenceLimiter(
+    max_concurrency=INFERENCE_CONCURRENCY,
+    max_queue=INFERENCE_QUEUE_LIMIT,
+    timeout=INFERENCE_TIMEOUT,
+)
+
+
+def _load_models():
+    """Load the NLU models and the Zeyrek analyzer."""
+    _get_classifier()
+    _get_ner()
+    _get_analyzer()
+
+
+async def warm_up():
+    """
+    Load the models on the inference pool before serving, so the first chat
+    requests don't spend their deadline on it (and get shed). Failures are
+    only logged; the models are then loaded lazily on first use.
+    """
+    logger.info("Loading NLU models...")
+    try:
+        await limiter.warm_up(_load_models)
+        logger.info("NLU models ready.")
+    except Exception as e:
+        logger.warning(f"NLU model warm-up failed: {e}. Models will be loaded on first request.")
+
+
+def _analyze(message: str, degraded: bool = False) -> tuple[str, dict, dict]:
+    """
+    Run the NLU steps for a message: normalization, intent, entities.
+
+    This is blocking (model inference) and runs on the limiter's thread pool.
+    In degraded mode it runs on the event loop, so only keyword intents and
+    heuristic parsing are used and Zeyrek is skipped.
+    """
+    # Step 1: Normalize the text
+    normalized = message.lower() if degraded else lemmatize(message)
+    logger.info(f"Normalized: '{message}' -> '{normalized}'")
+
+    # Step 2: Detect intent
+    intent_result = detect_intent_keywords(message) if degraded else detect_intent(message)
+    logger.info(f"Intent: {intent_result['intent']} (confidence: {intent_result['confidence']})")
+
+    # Step 3: Extract entities
+    entities = extract_item_and_location(message, use_ner=not degraded)
+    item = entities.get("item")
+    # Lemmatized item name for database search, computed here to keep Zeyrek off the event loop
+    entities["search"] = item and (item if degraded else normalize_for_search(item))
+    logger.info(f"Entities: item={item}, location={entities.get('location')}")
+
+    return normalized, intent_result, entities
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
@@ -18,25 +90,64 @@ async def chat(request: ChatRequest):
     Process a Turkish natural language message and execute the appropriate
     inventory action.
     """
+    response = await _process(request)
+    if FAST_RESPONSES:
+        # Serialize once with pydantic-core instead of re-validating the model
+        return Response(response.model_dump_json(), media_type="application/json")
+    return response
+
+
+async def _process(request: ChatRequest) -> ChatResponse:
+    """Run NLU on a chat message and dispatch it to the intent handler."""
     message = request.message.strip()
     if not message:
         return ChatResponse(reply="Lütfen bir mesaj girin.")
 
-    # Step 1: Normalize the text
-    normalized = lemmatize(message)
-    logger.info(f"Normalized: '{message}' -> '{normalized}'")
+    try:
+        warehouse = database.validate_warehouse(request.warehouse or DEFAULT_WAREHOUSE, allow_all=True)
+    except ValueError as e:
+        return ChatResponse(reply=str(e))
+
+    # Steps 1-3: NLU under admission control
+    degraded = False
+    try:
+        normalized, intent_result, entities = await limiter.run(_analyze, message)
+    except InferenceOverloaded as e:
+        if not INFERENCE_DEGRADED_MODE:
+            logger.warning(f"Chat request shed: {e.reason}")
+            raise HTTPException(
+                status_code=503,
+                detail="Sistem şu anda yoğun. Lütfen biraz sonra tekrar deneyin.",
+                headers={"Retry-After": str(INFERENCE_RETRY_AFTER)},
+            )
+        logger.warning(f"Inference overloaded ({e.reason}), answering in degraded mode.")
+        limiter.degraded += 1
+        degraded = True
+        normalized, intent_result, entities = _analyze(message, degraded=True)
 
-    # Step 2: Detect intent
-    intent_result = detect_intent(message)
     intent = intent_result["intent"]
     confidence = intent_result["confidence"]
-    logger.info(f"Intent: {intent} (confidence: {confidence})")
-
-    # Step 3: Extract entities
-    entities = extract_item_and_location(message)
     item_name = entities.get("item")
+    search_name = entities.get("search")
     location = entities.get("location")
-    logger.info(f"Entities: item={item_name}, location={location}")
+
+    # Only adding an item may create a new warehouse
+    exists = warehouse == ALL_WAREHOUSES or database.warehouse_exists(warehouse)
+
+    # A parsed location without a recognized case ending may still be the
+    # dative of a location the warehouse already has ("sandığa" -> "sandık")
+    if exists and intent == "add_item" and location and entities.get("location_suffix") == "":
+        location = await _known_stem(location, DATIVE, warehouse) or location
+
+    # "vida kaç tane var" asks about an item, "rafta kaç tane var" about a
+    # location; only a location the warehouse has makes it the latter
+    if intent == "location_summary" and not location:
+        if item_name and exists:
+            location = await _known_stem(item_name, LOCATIVE, warehouse)
+        if location:
+            item_name = search_name = None
+        else:
+            intent = "query_location"
 
     # Build NLU result
     nlu_result = NLUResult(
@@ -44,20 +155,29 @@ async def chat(request: ChatRequest):
         confidence=confidence,
         entities={"item": item_name, "location": location},
         normalized_text=normalized,
+        degraded=degraded,
     )
 
+    if intent != "add_item" and not exists:
+        return ChatResponse(reply=f"❌ '{warehouse}' adında bir depo bulunamadı.", nlu=nlu_result)
+    # "*" only fans out reads; an item is added to exactly one warehouse
+    if intent == "add_item" and warehouse == ALL_WAREHOUSES:
+        return ChatResponse(reply="❌ Ürün eklemek için tek bir depo seçin.", nlu=nlu_result)
+
     # Step 4: Execute action based on intent
     try:
         if intent == "add_item":
-            return await _handle_add(item_name, location, nlu_result)
+            return await _handle_add(item_name, location, warehouse, nlu_result)
         elif intent == "remove_item":
-            return await _handle_remove(item_name, nlu_result)
+            return await _handle_remove(item_name, search_name, warehouse, nlu_result)
         elif intent == "query_location":
-            return await _handle_query(item_name, normalized, nlu_result)
+            return await _handle_query(item_name, search_name, warehouse, nlu_result)
         elif intent == "list_items":
-            return await _handle_list(nlu_result)
+            return await _handle_list(warehouse, nlu_result)
         elif intent == "update_quantity":
-            return await _handle_update(item_name, message, nlu_result)
+            return await _handle_update(item_name, search_name, message, warehouse, nlu_result)
+        elif intent == "location_summary":
+            return await _handle_location_summary(location, warehouse, nlu_result)
         else:
             return ChatResponse(
                 reply=f"Komutu anlayamadım. Lütfen tekrar deneyin. (Algılanan niyet: {intent}, güven: {confidence:.2f})",
@@ -71,7 +191,22 @@ async def chat(request: ChatRequest):
         )
 
 
-async def _handle_add(item_name: str, location: str, nlu: NLUResult) -> ChatResponse:
+async def _known_stem(phrase: str, case: str, warehouse: str) -> str | None:
+    """The reading of phrase without a case ending that names one of the warehouse's locations."""
+    stems = case_stems(phrase, case)
+    if not stems:
+        return None
+    known = await database.known_locations(stems, warehouse=warehouse)
+    return next((stem for stem in stems if normalize_location(stem) in known), None)
+
+
+@router.get("/chat/stats")
+async def chat_stats():
+    """Inference queue depth and load-shedding counters."""
+    return limiter.stats()
+
+
+async def _handle_add(item_name: str, location: str, warehouse: str, nlu: NLUResult) -> ChatResponse:
     """Handle add_item intent."""
     if not item_name:
         return ChatResponse(
@@ -80,7 +215,7 @@ async def _handle_add(item_name: str, location: str, nlu: NLUResult) -> ChatResp
         )
 
     location = location or "belirtilmedi"
-    new_item = await database.add_item(item_name=item_name, location=location)
+    new_item = await database.add_item(item_name=item_name, location=location, warehouse=warehouse)
 
     return ChatResponse(
         reply=f"✅ '{item_name}' başarıyla '{location}' konumuna eklendi. (ID: {new_item['id']})",
@@ -89,7 +224,7 @@ async def _handle_add(item_name: str, location: str, nlu: NLUResult) -> ChatResp
     )
 
 
-async def _handle_remove(item_name: str, nlu: NLUResult) -> ChatResponse:
+async def _handle_remove(item_name: str, search_name: str, warehouse: str, nlu: NLUResult) -> ChatResponse:
     """Handle remove_item intent."""
     if not item_name:
         return ChatResponse(
@@ -98,12 +233,11 @@ async def _handle_remove(item_name: str, nlu: NLUResult) -> ChatResponse:
         )
 
     # Search for the item first
-    normalized_name = normalize_for_search(item_name)
-    items = await database.search_items(normalized_name)
+    items = await database.search_items(search_name, warehouse=warehouse)
 
     if not items:
         # Try original name
-        items = await database.search_items(item_name)
+        items = await database.search_items(item_name, warehouse=warehouse)
 
     if not items:
         return ChatResponse(
@@ -112,7 +246,7 @@ async def _handle_remove(item_name: str, nlu: NLUResult) -> ChatResponse:
         )
 
     # Delete the first match
-    deleted = await database.delete_item(items[0]["id"])
+    deleted = await database.delete_item(items[0]["id"], warehouse=items[0]["warehouse"])
     if deleted:
         return ChatResponse(
             reply=f"🗑️ '{items[0]['item_name']}' (ID: {items[0]['id']}) envantardan silindi.",
@@ -121,7 +255,7 @@ async def _handle_remove(item_name: str, nlu: NLUResult) -> ChatResponse:
     return ChatResponse(reply="Silme işlemi başarısız.", nlu=nlu)
 
 
-async def _handle_query(item_name: str, normalized: str, nlu: NLUResult) -> ChatResponse:
+async def _handle_query(item_name: str, search_name: str, warehouse: str, nlu: NLUResult) -> ChatResponse:
     """Handle query_location intent."""
     if not item_name:
         return ChatResponse(
@@ -130,9 +264,9 @@ async def _handle_query(item_name: str, normalized: str, nlu: NLUResult) -> Chat
         )
 
     # Search with normalized then original
-    items = await database.search_items(normalize_for_search(item_name))
+    items = await database.search_items(search_name, warehouse=warehouse)
     if not items:
-        items = await database.search_items(item_name)
+        items = await database.search_items(item_name, warehouse=warehouse)
 
     if not items:
         return ChatResponse(
@@ -155,9 +289,9 @@ async def _handle_query(item_name: str, normalized: str, nlu: NLUResult) -> Chat
     return ChatResponse(reply="\n".join(lines), nlu=nlu, data=items)
 
 
-async def _handle_list(nlu: NLUResult) -> ChatResponse:
+async def _handle_list(warehouse: str, nlu: NLUResult) -> ChatResponse:
     """Handle list_items intent."""
-    items = await database.get_all_items()
+    items = await database.get_all_items(warehouse=warehouse)
 
     if not items:
         return ChatResponse(reply="📦 Envanter boş.", nlu=nlu)
@@ -169,7 +303,7 @@ async def _handle_list(nlu: NLUResult) -> ChatResponse:
     return ChatResponse(reply="\n".join(lines), nlu=nlu, data=items)
 
 
-async def _handle_update(item_name: str, original_msg: str, nlu: NLUResult) -> ChatResponse:
+async def _handle_update(item_name: str, search_name: str, original_msg: str, warehouse: str, nlu: NLUResult) -> ChatResponse:
     """Handle update_quantity intent."""
     if not item_name:
         return ChatResponse(
@@ -183,9 +317,9 @@ async def _handle_update(item_name: str, original_msg: str, nlu: NLUResult) -> C
     quantity = int(numbers[0]) if numbers else None
 
     # Find the item
-    items = await database.search_items(normalize_for_search(item_name))
+    items = await database.search_items(search_name, warehouse=warehouse)
     if not items:
-        items = await database.search_items(item_name)
+        items = await database.search_items(item_name, warehouse=warehouse)
 
     if not items:
         return ChatResponse(
@@ -199,9 +333,28 @@ async def _handle_update(item_name: str, original_msg: str, nlu: NLUResult) -> C
             nlu=nlu,
         )
 
-    updated = await database.update_item(items[0]["id"], quantity=quantity)
+    updated = await database.update_item(items[0]["id"], quantity=quantity, warehouse=items[0]["warehouse"])
     return ChatResponse(
         reply=f"✅ '{updated['item_name']}' miktarı {quantity} olarak güncellendi.",
         nlu=nlu,
         data=[updated],
     )
+
+
+async def _handle_location_summary(location: str, warehouse: str, nlu: NLUResult) -> ChatResponse:
+    """Handle location_summary intent."""
+    if not location:
+        return ChatResponse(
+            reply="Hangi konumu sorduğunuzu anlayamadım. Lütfen 'X rafında ne var?' şeklinde sorun.",
+            nlu=nlu,
+        )
+
+    summary = await database.get_location_summary(location, warehouse=warehouse)
+    if not summary["item_count"]:
+        return ChatResponse(reply=f"📭 '{location}' konumunda ürün yok.", nlu=nlu)
+
+    return ChatResponse(
+        reply=f"📦 '{location}' konumunda {summary['item_count']} ürün var (toplam miktar: {summary['total_quantity']}).",
+        nlu=nlu,
+        data=[summary],
+    )
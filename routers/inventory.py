@@ -1,46 +1,98 @@
 """Inventory REST API endpoints."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from models import InventoryItemCreate, InventoryItemUpdate, InventoryItem
+from config import DEFAULT_WAREHOUSE, ALL_WAREHOUSES, FAST_RESPONSES
 import database
 
 router = APIRouter(prefix="/api/inventory", tags=["inventory"])
 
 
+def _new_warehouse(warehouse: str = Query(DEFAULT_WAREHOUSE, description="Depo adı")) -> str:
+    """Resolve the target warehouse of an insert; unknown warehouses are created."""
+    try:
+        return database.validate_warehouse(warehouse)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _warehouse(warehouse: str = Depends(_new_warehouse)) -> str:
+    """Resolve the warehouse of a single-shard operation on existing data."""
+    if not database.warehouse_exists(warehouse):
+        raise HTTPException(status_code=404, detail=f"Depo bulunamadı: '{warehouse}'")
+    return warehouse
+
+
+def _warehouse_or_all(warehouse: str = Query(DEFAULT_WAREHOUSE, description="Depo adı veya tüm depolar için '*'")) -> str:
+    """Resolve the warehouse of a read operation; '*' fans out to every warehouse."""
+    try:
+        warehouse = database.validate_warehouse(warehouse, allow_all=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if warehouse != ALL_WAREHOUSES and not database.warehouse_exists(warehouse):
+        raise HTTPException(status_code=404, detail=f"Depo bulunamadı: '{warehouse}'")
+    return warehouse
+
+
 @router.get("/", response_model=list[InventoryItem])
-async def list_items():
+async def list_items(warehouse: str = Depends(_warehouse_or_all)):
     """List all inventory items."""
-    items = await database.get_all_items()
+    if FAST_RESPONSES:
+        # Returning a Response skips response_model validation; the schema stays documented
+        return Response(await database.get_all_items_json(warehouse=warehouse), media_type="application/json")
+    items = await database.get_all_items(warehouse=warehouse)
     return items
 
 
 @router.post("/", response_model=InventoryItem, status_code=201)
-async def create_item(item: InventoryItemCreate):
+async def create_item(item: InventoryItemCreate, warehouse: str = Depends(_new_warehouse)):
     """Add a new item to the inventory."""
     new_item = await database.add_item(
         item_name=item.item_name,
         location=item.location,
         quantity=item.quantity,
+        warehouse=warehouse,
     )
     return new_item
 
 
 @router.get("/search")
-async def search_items(q: str = ""):
+async def search_items(q: str = "", warehouse: str = Depends(_warehouse_or_all)):
     """Search items by name or location."""
     if not q:
         return []
-    items = await database.search_items(q)
+    if FAST_RESPONSES:
+        return Response(await database.search_items_json(q, warehouse=warehouse), media_type="application/json")
+    items = await database.search_items(q, warehouse=warehouse)
     return items
 
 
+@router.get("/locations")
+async def list_locations(warehouse: str = Depends(_warehouse_or_all)):
+    """Item counts and total quantities per location."""
+    return await database.list_location_summaries(warehouse=warehouse)
+
+
+@router.get("/locations/{location}")
+async def get_location(location: str, warehouse: str = Depends(_warehouse_or_all)):
+    """Item count and total quantity at a single location."""
+    return await database.get_location_summary(location, warehouse=warehouse)
+
+
+@router.get("/warehouses")
+async def list_warehouses():
+    """List known warehouses."""
+    return database.list_warehouses()
+
+
 @router.put("/{item_id}", response_model=InventoryItem)
-async def update_item(item_id: int, item: InventoryItemUpdate):
+async def update_item(item_id: int, item: InventoryItemUpdate, warehouse: str = Depends(_warehouse)):
     """Update an inventory item."""
     updated = await database.update_item(
         item_id=item_id,
         item_name=item.item_name,
         location=item.location,
         quantity=item.quantity,
+        warehouse=warehouse,
     )
     if not updated:
         raise HTTPException(status_code=404, detail="Ürün bulunamadı")
@@ -48,9 +100,9 @@ async def update_item(item_id: int, item: InventoryItemUpdate):
 
 
 @router.delete("/{item_id}")
-async def delete_item(item_id: int):
+async def delete_item(item_id: int, warehouse: str = Depends(_warehouse)):
     """Delete an inventory item."""
-    deleted = await database.delete_item(item_id)
+    deleted = await database.delete_item(item_id, warehouse=warehouse)
     if not deleted:
         raise HTTPException(status_code=404, detail="Ürün bulunamadı")
-    return {"message": "Ürün silindi", "id": item_id}
+    return {"message": "Ürün silindi", "id": item_id, "warehouse": warehouse}
@@ -0,0 +1,32 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the database layer at a temporary directory with a fresh shard registry."""
+    monkeypatch.setattr(database, "DATABASE_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "main.db"))
+    database._shards.clear()
+    yield database
+    database._shards.clear()
+
+
+@pytest.fixture
+def run(db):
+    """Run a coroutine on a fresh event loop and close every shard afterwards."""
+    def _run(coro):
+        async def wrapper():
+            try:
+                return await coro
+            finally:
+                await db.close_all()
+        return asyncio.run(wrapper())
+    return _run
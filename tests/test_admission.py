@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from nlu.admission import InferenceLimiter, InferenceOverloaded
+
+
+def _blocking(event: threading.Event):
+    event.wait(5)
+    return "done"
+
+
+def test_queue_full_is_shed_immediately():
+    async def scenario():
+        limiter = InferenceLimiter(max_concurrency=1, max_queue=0, timeout=5)
+        release = threading.Event()
+        busy = asyncio.ensure_future(limiter.run(_blocking, release))
+        await asyncio.sleep(0.05)
+        try:
+            with pytest.raises(InferenceOverloaded) as e:
+                await limiter.run(_blocking, release)
+        finally:
+            release.set()
+        assert await busy == "done"
+        return e.value.reason, limiter.stats()
+
+    reason, stats = asyncio.run(scenario())
+    assert reason == "queue_full"
+    assert stats["shed_queue_full"] == 1
+    assert stats["completed"] == 1
+
+
+def test_queued_request_times_out():
+    async def scenario():
+        limiter = InferenceLimiter(max_concurrency=1, max_queue=1, timeout=0.2)
+        release = threading.Event()
+        busy = asyncio.ensure_future(limiter.run(_blocking, release))
+        await asyncio.sleep(0.05)
+        try:
+            with pytest.raises(InferenceOverloaded) as e:
+                await limiter.run(_blocking, release)
+            queued = limiter.queued
+        finally:
+            release.set()
+        with pytest.raises(InferenceOverloaded):
+            await busy
+        return e.value.reason, queued
+
+    reason, queued = asyncio.run(scenario())
+    assert reason == "queue_timeout"
+    assert queued == 0
+
+
+def test_deadline_keeps_slot_until_worker_finishes():
+    async def scenario():
+        limiter = InferenceLimiter(max_concurrency=1, max_queue=0, timeout=0.1)
+        release = threading.Event()
+        with pytest.raises(InferenceOverloaded) as e:
+            await limiter.run(_blocking, release)
+        after_timeout = limiter.stats()
+        # The worker thread is still busy, so the slot must not be handed out
+        with pytest.raises(InferenceOverloaded) as full:
+            await limiter.run(_blocking, release)
+        release.set()
+        while limiter.in_flight:
+            await asyncio.sleep(0.01)
+        assert await limiter.run(str, 1) == "1"
+        return e.value.reason, full.value.reason, after_timeout, limiter.stats()
+
+    reason, full_reason, after_timeout, final = asyncio.run(scenario())
+    assert reason == "deadline_exceeded"
+    assert full_reason == "queue_full"
+    assert after_timeout["in_flight"] == 1
+    assert after_timeout["completed"] == 0
+    assert final["in_flight"] == 0
+    assert final["completed"] == 1
+    assert final["shed_timeout"] == 1
+
+
+def test_chat_returns_503_with_retry_after(monkeypatch):
+    from routers import chat
+
+    async def overloaded(*args):
+        raise InferenceOverloaded("queue_full")
+
+    monkeypatch.setattr(chat.limiter, "run", overloaded)
+    monkeypatch.setattr(chat, "INFERENCE_DEGRADED_MODE", False)
+    app = FastAPI()
+    app.include_router(chat.router)
+
+    with TestClient(app) as client:
+        response = client.post("/api/chat", json={"message": "kalem nerede?"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(chat.INFERENCE_RETRY_AFTER)
+
+
+def test_warm_up_loads_models_on_the_inference_pool(monkeypatch):
+    from routers import chat
+
+    threads = []
+
+    def load():
+        threads.append(threading.current_thread().name)
+        raise OSError("model not found")
+
+    monkeypatch.setattr(chat, "_load_models", load)
+    limiter = InferenceLimiter(max_concurrency=1, max_queue=0, timeout=5)
+    monkeypatch.setattr(chat, "limiter", limiter)
+
+    asyncio.run(chat.warm_up())  # failures are only logged
+
+    assert threads and threads[0].startswith("nlu")
+    assert limiter.stats()["in_flight"] == 0
@@ -0,0 +1,45 @@
+import pytest
+
+from routers import chat
+
+
+def _forbidden(*args, **kwargs):
+    raise AssertionError("Zeyrek must not run in degraded mode")
+
+
+def test_degraded_analysis_skips_zeyrek(monkeypatch):
+    monkeypatch.setattr(chat, "lemmatize", _forbidden)
+    monkeypatch.setattr(chat, "normalize_for_search", _forbidden)
+
+    normalized, intent, entities = chat._analyze("Kalem nerede?", degraded=True)
+
+    assert normalized == "kalem nerede?"
+    assert intent["intent"] == "query_location"
+    assert entities["item"] == "kalem"
+    assert entities["search"] == "kalem"
+
+
+@pytest.mark.parametrize("message", ["Mavi dosyayı üst rafa koy", "listele"])
+def test_degraded_analysis_never_loads_models(monkeypatch, message):
+    monkeypatch.setattr(chat, "lemmatize", _forbidden)
+    monkeypatch.setattr(chat, "normalize_for_search", _forbidden)
+    monkeypatch.setattr(chat, "detect_intent", _forbidden)
+
+    chat._analyze(message, degraded=True)
+
+
+def test_add_to_all_warehouses_is_rejected(db, run, monkeypatch):
+    from models import ChatRequest
+    from nlu.admission import InferenceOverloaded
+
+    async def overloaded(*args):
+        raise InferenceOverloaded("queue_full")
+
+    monkeypatch.setattr(chat.limiter, "run", overloaded)
+    monkeypatch.setattr(chat, "INFERENCE_DEGRADED_MODE", True)
+
+    response = run(chat._process(ChatRequest(message="kalemi üst rafa koy", warehouse="*")))
+
+    assert response.nlu.intent == "add_item"
+    assert response.reply == "❌ Ürün eklemek için tek bir depo seçin."
+    assert db.list_warehouses() == []
@@ -0,0 +1,39 @@
+import json
+import sqlite3
+
+import pytest
+
+import database
+
+
+@pytest.mark.parametrize("aggregate_order_by", [False, True])
+def test_json_matches_row_path(db, run, monkeypatch, aggregate_order_by):
+    if aggregate_order_by and sqlite3.sqlite_version_info < (3, 44, 0):
+        pytest.skip("ORDER BY inside aggregates needs SQLite 3.44+")
+    monkeypatch.setattr(database, "_AGGREGATE_ORDER_BY", aggregate_order_by)
+
+    async def scenario():
+        for n in range(5):
+            item = await db.add_item(f"çanta \"{n}\"", "üst raf", n)
+            await db.update_item(item["id"], quantity=n + 1)
+        conn = await db.aiosqlite.connect(db.DATABASE_PATH)
+        await conn.execute("UPDATE inventory SET last_updated = '2024-01-0' || id")
+        await conn.commit()
+        await conn.close()
+        return (
+            await db.get_all_items(), json.loads(await db.get_all_items_json()),
+            await db.search_items("1"), json.loads(await db.search_items_json("1")),
+        )
+
+    rows, rows_json, found, found_json = run(scenario())
+    assert rows_json == rows
+    assert [i["id"] for i in rows] == [5, 4, 3, 2, 1]
+    assert found_json == found
+
+
+def test_json_of_empty_warehouse(db, run):
+    async def scenario():
+        await db.init_db()
+        return await db.get_all_items_json()
+
+    assert run(scenario()) == b"[]"
@@ -0,0 +1,140 @@
+import pytest
+
+from models import ChatRequest
+from nlu.admission import InferenceOverloaded
+from nlu.ner import _heuristic_parse
+from nlu.normalizer import DATIVE, LOCATIVE, normalize_location, split_case
+from routers import chat
+
+
+@pytest.fixture
+def degraded_chat(monkeypatch):
+    """Run chat messages through the degraded NLU path (keywords + heuristics, no models)."""
+    async def overloaded(*args):
+        raise InferenceOverloaded("queue_full")
+
+    monkeypatch.setattr(chat.limiter, "run", overloaded)
+    monkeypatch.setattr(chat, "INFERENCE_DEGRADED_MODE", True)
+
+    async def send(message, warehouse=None):
+        return await chat._process(ChatRequest(message=message, warehouse=warehouse))
+
+    return send
+
+
+@pytest.mark.parametrize("dative, locative, key", [
+    ("üst rafa", "üst rafta", "üst raf"),
+    ("masaya", "masada", "masa"),
+    ("A1 rafına", "A1 rafında", "a1 rafı"),
+    ("dolaba", "dolapta", "dolap"),
+    ("B2'ye", "B2'de", "b2"),
+    ("kutuya", "kutuda", "kutu"),
+])
+def test_dative_and_locative_give_the_same_key(dative, locative, key):
+    assert normalize_location(split_case(dative, DATIVE)[0]) == key
+    assert normalize_location(split_case(locative, LOCATIVE)[0]) == key
+
+
+@pytest.mark.parametrize("location", ["masa", "Ankara", "Bölge", "Şube", "makine", "oda"])
+def test_bare_names_keep_their_ending(location):
+    assert split_case(location, DATIVE) == (location, "")
+    assert split_case(location, LOCATIVE) == (location, "")
+
+
+def test_known_locations_allow_a_split():
+    assert split_case("sandığa", DATIVE) == ("sandığa", "")
+    assert split_case("sandığa", DATIVE, known=frozenset({"sandık"})) == ("sandık", "a")
+
+
+@pytest.mark.parametrize("message, parsed", [
+    ("kalemi masa koy", ("kalemi", "masa", "")),
+    ("kalemi Ankara koy", ("kalemi", "ankara", "")),
+    ("kalemi üst rafa koy", ("kalemi", "üst raf", "a")),
+    ("üst rafta ne var", (None, "üst raf", "ta")),
+    ("kalem kaç tane var", ("kalem", None, None)),
+    ("vida kaç tane var", ("vida", None, None)),
+    ("çanta kaç tane var", ("çanta", None, None)),
+    ("A1 rafında kaç ürün var", (None, "a1 rafı", "nda")),
+])
+def test_heuristic_parse_splits_only_recognized_endings(message, parsed):
+    assert _heuristic_parse(message) == parsed
+
+
+def test_add_then_query_location_in_chat(db, run, degraded_chat):
+    async def scenario():
+        await degraded_chat("kalemi üst rafa koy", warehouse="izmir")
+        await degraded_chat("silgiyi üst rafa koy", warehouse="izmir")
+        await degraded_chat("defteri A1 rafına koy", warehouse="izmir")
+        return (
+            await degraded_chat("üst rafta ne var?", warehouse="izmir"),
+            await degraded_chat("A1 rafında ne var?", warehouse="izmir"),
+            await degraded_chat("alt rafta ne var?", warehouse="izmir"),
+        )
+
+    upper, a1, lower = run(scenario())
+    assert upper.nlu.intent == "location_summary"
+    assert upper.data[0]["item_count"] == 2
+    assert a1.data[0]["item_count"] == 1
+    assert lower.data is None
+
+
+def test_bare_location_is_stored_unchanged(db, run, degraded_chat):
+    response = run(degraded_chat("kalemi masa koy"))
+    assert response.data[0]["location"] == "masa"
+
+
+@pytest.mark.parametrize("item", ["kalem", "vida", "çanta"])
+def test_item_count_question_is_an_item_query(db, run, degraded_chat, item):
+    async def scenario():
+        await degraded_chat(f"{item}yı üst rafa koy" if item[-1] == "a" else f"{item}i üst rafa koy")
+        return await degraded_chat(f"{item} kaç tane var")
+
+    response = run(scenario())
+    assert response.nlu.intent == "query_location"
+    assert response.data[0]["item_name"].startswith(item)
+
+
+def test_count_question_about_a_known_location(db, run, degraded_chat):
+    async def scenario():
+        await degraded_chat("kalemi sandık koy")
+        await degraded_chat("silgiyi sandığa koy")
+        return await degraded_chat("sandıkta kaç ürün var")
+
+    response = run(scenario())
+    assert response.nlu.intent == "location_summary"
+    assert response.data[0]["item_count"] == 2
+
+
+def test_summary_follows_updates_and_deletes(db, run):
+    async def scenario():
+        a = await db.add_item("kalem", "Üst Raf", 3)
+        b = await db.add_item("silgi", "üst  raf", 2)
+        await db.add_item("defter", "alt raf", 1)
+        await db.update_item(b["id"], location="alt raf", quantity=5)
+        await db.delete_item(a["id"])
+        return (
+            await db.get_location_summary("ÜST RAF"),
+            await db.get_location_summary("alt raf"),
+            await db.check_location_summary(),
+        )
+
+    upper, lower, check = run(scenario())
+    assert (upper["item_count"], upper["total_quantity"]) == (0, 0)
+    assert (lower["item_count"], lower["total_quantity"]) == (2, 6)
+    assert check["consistent"]
+
+
+def test_check_rebuilds_drifted_summary(db, run):
+    async def scenario():
+        await db.add_item("kalem", "raf", 3)
+        async with db._connection(db.DEFAULT_WAREHOUSE, write=True) as conn:
+            await conn.execute("UPDATE location_summary SET item_count = 99")
+            await conn.commit()
+        first = await db.check_location_summary(repair=True)
+        second = await db.check_location_summary()
+        return first, second
+
+    first, second = run(scenario())
+    assert not first["consistent"] and first["repaired"]
+    assert first["mismatches"][0]["expected"] == {"item_count": 1, "total_quantity": 3}
+    assert second["consistent"]
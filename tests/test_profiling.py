@@ -0,0 +1,107 @@
+import asyncio
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import profiling
+from routers import admin
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    """A fresh profiler with a small ring buffer, used by the middleware and the admin router."""
+    monkeypatch.setattr(profiling, "PROFILE_BUFFER_SIZE", 3)
+    monkeypatch.setattr(profiling, "SLOW_REQUEST_MS", None)
+    fresh = profiling.Profiler()
+    monkeypatch.setattr(profiling, "profiler", fresh)
+    monkeypatch.setattr(admin, "profiler", fresh)
+    yield fresh
+    fresh.disable()
+
+
+@pytest.fixture
+def client(profiler, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(admin.router)
+
+    @app.get("/api/inventory/ping")
+    async def ping(delay: float = 0):
+        await asyncio.sleep(delay)
+        return {"ok": True}
+
+    with TestClient(app, headers={"X-Admin-Token": "secret"}) as client:
+        yield client
+
+
+def test_admin_hidden_without_token(client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "")
+    assert client.get("/api/admin/profiling").status_code == 404
+
+
+def test_admin_rejects_wrong_token(client):
+    assert client.get("/api/admin/profiling", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/api/admin/profiling").status_code == 200
+
+
+@pytest.mark.parametrize("mode", ["sample", "cprofile"])
+def test_armed_requests_are_captured(client, profiler, mode):
+    client.post("/api/admin/profiling", json={"requests": 2, "mode": mode})
+    for _ in range(3):
+        client.get("/api/inventory/ping")
+
+    captures = client.get("/api/admin/profiles").json()
+    assert [c["reason"] for c in captures] == ["armed", "armed"]
+    assert all(c["mode"] == mode for c in captures)
+    assert not profiler.active
+    detail = client.get(f"/api/admin/profiles/{captures[0]['id']}").json()
+    if mode == "cprofile":
+        assert "ping" in detail["pstats_text"]
+        assert client.get(f"/api/admin/profiles/{captures[0]['id']}/pstats").status_code == 200
+    else:
+        assert detail["samples"] is not None
+
+
+def test_slow_threshold_keeps_only_slow_requests(client):
+    client.post("/api/admin/profiling", json={"slow_ms": 50})
+    client.get("/api/inventory/ping")
+    client.get("/api/inventory/ping?delay=0.1")
+    client.get("/api/inventory/ping")
+
+    captures = client.get("/api/admin/profiles").json()
+    assert len(captures) == 1
+    assert captures[0]["reason"] == "slow"
+    assert captures[0]["duration_ms"] >= 50
+
+
+def test_ring_buffer_evicts_oldest(client, profiler):
+    client.post("/api/admin/profiling", json={"requests": 5})
+    for _ in range(5):
+        client.get("/api/inventory/ping")
+
+    assert [c["id"] for c in client.get("/api/admin/profiles").json()] == [3, 4, 5]
+
+
+def test_inactive_middleware_passes_requests_through(client, profiler, monkeypatch):
+    async def forbidden(*args):
+        raise AssertionError("inactive profiler must not run")
+
+    monkeypatch.setattr(profiler, "profile", forbidden)
+    assert client.get("/api/inventory/ping").json() == {"ok": True}
+    assert not profiler.captures
+
+
+def test_memory_tracing_stops_with_the_last_armed_request(client, profiler):
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc was started outside the profiler")
+    client.post("/api/admin/profiling", json={"requests": 1, "trace_memory": True})
+    assert tracemalloc.is_tracing()
+    client.get("/api/inventory/ping")
+
+    assert not profiler.active
+    assert not tracemalloc.is_tracing()
+    (capture,) = profiler.captures
+    assert isinstance(capture["memory"], list)
@@ -0,0 +1,84 @@
+import json
+import logging
+
+import pytest
+
+from nlu import registry
+
+HUB_ID = "example/turkish-model"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """An empty registry in a temporary MODEL_DIR, with the intent model set to HUB_ID."""
+    monkeypatch.setattr(registry, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setitem(registry.MODELS, "intent", (HUB_ID, "zero-shot-classification", "AutoModel"))
+    return tmp_path
+
+
+def _add_snapshot(store, version, source=HUB_ID):
+    path = store / "intent" / version
+    path.mkdir(parents=True)
+    (path / "manifest.json").write_text(json.dumps({"version": version, "source": source}))
+    return path
+
+
+def test_list_and_use_versions(store):
+    assert registry.list_versions("intent") == []
+    _add_snapshot(store, "v1")
+    _add_snapshot(store, "v2")
+    (store / "intent" / "v3.tmp").mkdir()  # unfinished snapshot
+
+    assert [m["version"] for m in registry.list_versions("intent")] == ["v1", "v2"]
+    assert registry.current_version("intent") is None
+
+    registry.use_version("intent", "v1")
+    assert registry.current_version("intent") == "v1"
+    with pytest.raises(ValueError):
+        registry.use_version("intent", "v3.tmp")
+    assert registry.current_version("intent") == "v1"
+
+
+def test_resolve_uses_active_snapshot_of_the_same_source(store):
+    assert registry.resolve("intent") is None
+    path = _add_snapshot(store, "v1")
+    registry.use_version("intent", "v1")
+    assert registry.resolve("intent") == str(path)
+
+
+def test_resolve_prefers_a_configured_local_path(store, monkeypatch):
+    local = store / "my-model"
+    local.mkdir()
+    monkeypatch.setitem(registry.MODELS, "intent", (str(local), "zero-shot-classification", "AutoModel"))
+    assert registry.resolve("intent") == str(local)
+
+
+def test_resolve_ignores_snapshot_of_another_model(store, caplog):
+    _add_snapshot(store, "v1", source="example/other-model")
+    registry.use_version("intent", "v1")
+    with caplog.at_level(logging.WARNING):
+        assert registry.resolve("intent") is None
+    assert "is not of" in caplog.text
+
+
+@pytest.mark.parametrize("damage", ["directory", "manifest", "corrupt"])
+def test_resolve_falls_back_when_current_snapshot_is_broken(store, caplog, damage):
+    path = _add_snapshot(store, "v1")
+    registry.use_version("intent", "v1")
+    if damage == "directory":
+        (path / "manifest.json").unlink()
+        path.rmdir()
+    elif damage == "manifest":
+        (path / "manifest.json").unlink()
+    else:
+        (path / "manifest.json").write_text("{")
+
+    with caplog.at_level(logging.WARNING):
+        assert registry.resolve("intent") is None
+    assert "missing or unreadable" in caplog.text
+
+
+def test_offline_without_snapshot_fails_before_loading_transformers(store, monkeypatch):
+    monkeypatch.setattr(registry, "MODEL_OFFLINE", True)
+    with pytest.raises(RuntimeError, match="snapshot intent"):
+        registry.load_pipeline("intent")
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import ALL_WAREHOUSES
+
+
+@pytest.fixture
+def client(db, run):
+    from routers import inventory
+
+    run(db.init_db())
+    app = FastAPI()
+    app.include_router(inventory.router)
+    with TestClient(app) as client:
+        yield client
+    run(db.close_all())
+
+
+@pytest.mark.parametrize("name", ["main", "izmir-2", "depo_1"])
+def test_validate_warehouse_accepts_plain_names(db, name):
+    assert db.validate_warehouse(name) == name
+
+
+@pytest.mark.parametrize("name", ["../x", "a/b", "", "Izmir", "-x", "x" * 65])
+def test_validate_warehouse_rejects_unsafe_names(db, name):
+    with pytest.raises(ValueError):
+        db.validate_warehouse(name)
+
+
+def test_validate_warehouse_all_only_for_reads(db):
+    assert db.validate_warehouse(ALL_WAREHOUSES, allow_all=True) == ALL_WAREHOUSES
+    with pytest.raises(ValueError):
+        db.validate_warehouse(ALL_WAREHOUSES)
+
+
+def test_api_rejects_invalid_and_wildcard_writes(client):
+    item = {"item_name": "kalem", "location": "raf"}
+    assert client.post("/api/inventory/?warehouse=../x", json=item).status_code == 400
+    assert client.post("/api/inventory/?warehouse=*", json=item).status_code == 400
+    assert client.delete("/api/inventory/1?warehouse=*").status_code == 400
+    assert client.get("/api/inventory/?warehouse=../x").status_code == 400
+
+
+def test_writes_go_to_separate_files(db, run):
+    async def scenario():
+        await db.add_item("kalem", "raf", warehouse="izmir")
+        await db.add_item("defter", "raf", warehouse="ankara")
+        await db.add_item("silgi", "raf", warehouse="ankara")
+
+    run(scenario())
+
+    def names(warehouse):
+        conn = sqlite3.connect(os.path.join(db.DATABASE_DIR, f"{warehouse}.db"))
+        try:
+            return sorted(row[0] for row in conn.execute("SELECT item_name FROM inventory"))
+        finally:
+            conn.close()
+
+    assert names("izmir") == ["kalem"]
+    assert names("ankara") == ["defter", "silgi"]
+    assert not os.path.exists(db.DATABASE_PATH)
+
+
+def test_reads_do_not_create_warehouses(client, db):
+    assert client.get("/api/inventory/?warehouse=typo").status_code == 404
+    assert client.get("/api/inventory/search?q=a&warehouse=typo").status_code == 404
+    assert client.put("/api/inventory/1?warehouse=typo", json={"quantity": 2}).status_code == 404
+    assert client.get("/api/inventory/?warehouse=*").json() == []
+    assert not os.path.exists(os.path.join(db.DATABASE_DIR, "typo.db"))
+    assert db.list_warehouses() == ["main"]
+
+
+def test_fan_out_merges_by_last_updated(db, run):
+    async def add():
+        for warehouse, name in [("a", "a1"), ("b", "b1"), ("a", "a2"), ("b", "b2")]:
+            await db.add_item(name, "raf", warehouse=warehouse)
+
+    run(add())
+    timestamps = {"a1": "2024-01-01 10:00:00", "a2": "2024-01-03 10:00:00",
+                  "b1": "2024-01-02 10:00:00", "b2": "2024-01-04 10:00:00"}
+    for warehouse in ("a", "b"):
+        conn = sqlite3.connect(os.path.join(db.DATABASE_DIR, f"{warehouse}.db"))
+        for name, ts in timestamps.items():
+            conn.execute("UPDATE inventory SET last_updated = ? WHERE item_name = ?", (ts, name))
+        conn.commit()
+        conn.close()
+
+    items = run(db.get_all_items(warehouse=ALL_WAREHOUSES))
+    assert [(i["item_name"], i["warehouse"]) for i in items] == [
+        ("b2", "b"), ("a2", "a"), ("b1", "b"), ("a1", "a"),
+    ]
+    found = run(db.search_items("1", warehouse=ALL_WAREHOUSES))
+    assert [i["item_name"] for i in found] == ["b1", "a1"]
+
+
+def test_lru_eviction_past_max_open_shards(db, run, monkeypatch):
+    monkeypatch.setattr(db, "MAX_OPEN_SHARDS", 2)
+
+    def open_shards():
+        return [name for name, shard in db._shards.items() if shard.is_open]
+
+    async def scenario():
+        for warehouse in ("a", "b", "c"):
+            await db.add_item("kalem", "raf", warehouse=warehouse)
+        after_writes = open_shards()
+        await db.get_all_items(warehouse="a")
+        after_read = open_shards()
+        return after_writes, after_read
+
+    after_writes, after_read = run(scenario())
+    assert after_writes == ["b", "c"]
+    assert after_read == ["c", "a"]
+
+
+def test_writers_of_different_shards_run_concurrently(db, run):
+    """A long write on one shard neither blocks another shard's writer nor its own readers."""
+    async def scenario():
+        await db.add_item("kalem", "raf", warehouse="a")
+        await db.add_item("defter", "raf", warehouse="b")
+        entered = asyncio.Event()
+
+        async def slow_write():
+            async with db._connection("a", write=True) as conn:
+                await conn.create_function("pause", 1, lambda seconds: time.sleep(seconds) or 0)
+                entered.set()
+                # Runs on shard a's connection thread, holding its writer for 0.5s
+                await conn.execute("SELECT pause(0.5)")
+
+        slow = asyncio.create_task(slow_write())
+        await entered.wait()
+        start = time.perf_counter()
+        await db.add_item("silgi", "raf", warehouse="b")
+        await db.get_all_items(warehouse="a")
+        other = time.perf_counter() - start
+        same = asyncio.create_task(db.add_item("cetvel", "raf", warehouse="a"))
+        await asyncio.sleep(0.05)
+        queued_behind = not same.done()
+        await slow
+        await same
+        return other, queued_behind
+
+    other, queued_behind = run(scenario())
+    assert other < 0.25
+    assert queued_behind
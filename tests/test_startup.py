@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("torch", "transformers")
+
+_PROBE = f"""
+import json, sys
+import main
+print(json.dumps(sorted(m for m in sys.modules if m.split(".")[0] in {HEAVY!r})))
+"""
+
+
+@pytest.mark.parametrize("rest_only", ["0", "1"])
+def test_import_main_does_not_load_torch_or_transformers(rest_only):
+    env = {**os.environ, "REST_ONLY": rest_only}
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert json.loads(proc.stdout.strip().splitlines()[-1]) == []